@@ -0,0 +1,207 @@
+#----------------------------------------------------------------------------#
+# Artists.
+# forms.py (WTForms) is imported by the views that render a form, on first use
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from models import db, Artist
+from pagination import page_args
+from queries import ARTIST_PAGE_KEYS, artist_list_page, search_by_name, artist_validator, artist_details
+from responses import not_modified, conditional_response, not_modified_response, flashes_pending, uncacheable_response, \
+  artist_page_key, artist_page_keys, page_ttl, cached_page, api_response, api_fields, api_page, api_not_found
+from cache import page_cache
+from replicas import read_only
+
+bp = Blueprint('artists', __name__)
+
+def render_artist_page(artist_id, now):
+  data = artist_details(artist_id, now)
+  return render_template('pages/show_artist.html', artist=data), page_ttl(data['upcoming_shows'], now)
+
+@bp.route('/artists')
+def artists():
+  # TODO-DONE: replace with real data returned from querying the database
+
+  data, page = artist_list_page(**page_args(ARTIST_PAGE_KEYS))
+
+  return render_template('pages/artists.html', artists=data, page=page)
+
+@bp.route('/artists/search', methods=['POST'])
+@read_only
+def search_artists():
+  # TODO-DONE: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+  
+  search_term=request.form.get('search_term', '')
+  all_matching_results = search_by_name(Artist, search_term)
+  matching_result_data = []
+
+  for result in all_matching_results:
+    matching_result_data.append({
+      "id": result.id,
+      "name": result.name,
+      "num_upcoming_shows": result.upcoming_shows_count
+      })
+
+  # make response dictionary from all_matching results
+  response = {
+    "count": len(all_matching_results),
+    "data": matching_result_data
+  }
+
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+  # shows the venue page with the given venue_id
+  # TODO-DONE: replace with real venue data from the venues table, using venue_id
+  
+  now = datetime.now()
+
+  # cheap validator first: a repeat visit is answered with 304 before the heavy queries run
+  validator = artist_validator(artist_id, now)
+
+  # if query on artist fails
+  if validator is None:
+    return render_template('errors/404.html')
+  # e.g. right after an edit: sent in full, without etag/last-modified and not from the cache
+  if flashes_pending():
+    return uncacheable_response(render_artist_page(artist_id, now)[0])
+  if not_modified(*validator):
+    return not_modified_response(*validator)
+
+  html = cached_page(artist_page_key(artist_id), validator[0], 'artist', lambda: render_artist_page(artist_id, now))
+  return conditional_response(html, *validator)
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  from forms import ArtistForm
+  form = ArtistForm()
+  
+  # TODO-DONE: populate form with fields from artist with ID <artist_id>
+  artist = Artist.query.get(artist_id)
+
+  # populate form values with existing data
+  # id should remain same
+  if artist:
+    form.name.data = artist.name
+    form.city.data = artist.city
+    form.state.data = artist.state
+    form.phone.data = artist.phone
+    form.genres.data = artist.genres
+    form.facebook_link.data = artist.facebook_link
+    # uncomment following lines if there is corresponding input space avilable in the form
+    # form.image_link.data = artist.image_link
+    # form.website.data = artist.website
+    # form.seeking_venue.data = artist.seeking_venue
+    # form.seeking_description.data = artist.seeking_description
+
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO-DONE: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+
+  error = False
+  artist = Artist.query.get(artist_id)
+
+  try:
+    # update with new values
+    artist.name = request.form['name']
+    artist.city = request.form['city']
+    artist.state = request.form['state']
+    artist.phone = request.form['phone']
+    artist.genres = request.form.getlist('genres')
+    artist.facebook_link = request.form['facebook_link']
+    # uncomment following lines if there is corresponding input space avilable in the form
+    # artist.image_link = request.form['image_link']
+    # artist.website = request.form['website']
+    # artist.seeking_venue = True if 'seeking_venue' in request.form else False 
+    # artist.seeking_description = request.form['seeking_description']
+
+    db.session.commit()
+    page_cache.delete(*artist_page_keys(artist_id))
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    flash('An error occurred while updating details.')
+  else:
+    flash('Artist updated successfully!.')
+  
+  return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # TODO-DONE: insert form data as a new Venue record in the db, instead
+  # TODO-DONE: modify data to be the data object returned from db insertion
+  error = False
+  try:
+    artist = Artist(
+    name = request.form['name']
+    ,city = request.form['city']
+    ,state = request.form['state']
+    ,phone = request.form['phone']
+    ,genres = request.form.getlist('genres')
+    ,facebook_link = request.form['facebook_link']
+    # uncomment following lines if there is corresponding input in the form
+    # ,image_link = request.form['image_link']
+    # ,website = request.form['website']
+    # ,seeking_venue = True if 'seeking_venue' in request.form else False
+    # ,seeking_description = request.form['seeking_description']
+    )
+    db.session.add(artist)
+    db.session.commit()
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    # TODO-DONE: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Artist ' + data.name + ' could not be listed.')
+    flash('An error occurred. Artist ' + request.form['name'] + ' could not be listed.')
+    
+  # on successful db insert, flash success
+  else:
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+  
+  return render_template('pages/home.html')
+
+#  API
+#  ----------------------------------------------------------------
+
+@bp.route('/api/v1/artists')
+def api_artists():
+  rows, page = artist_list_page(**page_args(ARTIST_PAGE_KEYS))
+  return api_page([{"id": row.id, "name": row.name} for row in rows], page)
+
+@bp.route('/api/v1/artists/<int:artist_id>')
+def api_artist(artist_id):
+  now = datetime.now()
+  validator = artist_validator(artist_id, now, 'json')
+  if validator is None:
+    return api_not_found()
+  if not_modified(*validator):
+    return not_modified_response(*validator)
+  return conditional_response(api_response(api_fields(artist_details(artist_id, now))), *validator)
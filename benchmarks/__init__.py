@@ -0,0 +1,16 @@
+#----------------------------------------------------------------------------#
+# Benchmarks.
+#
+# Seeds a throwaway database with venues, artists and shows, drives every
+# route of the app through the Flask test client and reports latency
+# percentiles, queries per request and peak RSS.
+#
+#   python -m benchmarks                                  # temporary sqlite database
+#   python -m benchmarks --venues 2000 --shows 200000     # bigger data set
+#   python -m benchmarks --database-url postgresql://postgres@localhost/fyyur_bench --reset
+#   python -m benchmarks --max-p95-ms 250                 # exit 1 if any route is slower (deploy gate)
+#
+#   python -m benchmarks.datetime_filter                  # micro-benchmark of the datetime template filter
+#   python -m benchmarks.query_overhead                   # Python cost of the hot queries, Query vs lambda_stmt
+#   python -m benchmarks.importtime                       # cold start cost, python -X importtime
+#----------------------------------------------------------------------------#
@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import warnings
+from datetime import datetime
+
+# statement count reported by instrumentation.py in the Server-Timing header
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Seed a throwaway database and benchmark every route of the app.')
+  parser.add_argument('--database-url', help='database to seed and benchmark against (default: a temporary sqlite file)')
+  parser.add_argument('--reset', action='store_true', help='drop and recreate the tables of --database-url first')
+  parser.add_argument('--venues', type=int, default=200)
+  parser.add_argument('--artists', type=int, default=500)
+  parser.add_argument('--shows', type=int, default=5000)
+  parser.add_argument('--seed', type=int, default=0, help='random seed for the data set and the visited ids')
+  parser.add_argument('--anchor-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+    help='YYYY-MM-DD the show start times are spread around (default: today), fix it to compare runs of different days')
+  parser.add_argument('--requests', type=int, default=50, help='timed requests per route')
+  parser.add_argument('--max-p95-ms', type=float, help='exit with status 1 when a route p95 is above this')
+  parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+  return parser.parse_args(argv)
+
+def absolute_sqlite_url(url):
+  # sqlite:///relative.db with an absolute path to the file, other urls as they are
+  from sqlalchemy.engine.url import make_url
+  parsed = make_url(url)
+  if parsed.get_backend_name() != 'sqlite' or not parsed.database or parsed.database == ':memory:' or os.path.isabs(parsed.database):
+    return url
+  return parsed.set(database=os.path.abspath(parsed.database)).render_as_string(hide_password=False)
+
+def percentile(sorted_values, fraction):
+  # nearest-rank percentile
+  if not sorted_values:
+    return 0.0
+  index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+  return sorted_values[index]
+
+def routes(rng, args):
+  # (name, method, url or callable returning one, form data) for every route of the app.
+  # DELETE /venues/<id> is left out, it would remove the data the other routes read
+  venue_id = lambda: rng.randint(1, args.venues)
+  artist_id = lambda: rng.randint(1, args.artists)
+  term = lambda: rng.choice(['a', 'band', 'music', 'hop', 'park', 'zzz'])
+  return [
+    ('index', 'GET', '/', None),
+    ('venues', 'GET', '/venues', None),
+    ('search_venues', 'POST', '/venues/search', lambda: {'search_term': term()}),
+    ('show_venue', 'GET', lambda: '/venues/{}'.format(venue_id()), None),
+    ('create_venue_form', 'GET', '/venues/create', None),
+    ('artists', 'GET', '/artists', None),
+    ('search_artists', 'POST', '/artists/search', lambda: {'search_term': term()}),
+    ('show_artist', 'GET', lambda: '/artists/{}'.format(artist_id()), None),
+    ('edit_artist', 'GET', lambda: '/artists/{}/edit'.format(artist_id()), None),
+    ('edit_venue', 'GET', lambda: '/venues/{}/edit'.format(venue_id()), None),
+    ('create_artist_form', 'GET', '/artists/create', None),
+    ('shows', 'GET', '/shows', None),
+    ('create_shows', 'GET', '/shows/create', None),
+    ('metrics', 'GET', '/metrics', None),
+    ('api_venues', 'GET', '/api/v1/venues', None),
+    ('api_venue', 'GET', lambda: '/api/v1/venues/{}'.format(venue_id()), None),
+    ('api_artists', 'GET', '/api/v1/artists', None),
+    ('api_artist', 'GET', lambda: '/api/v1/artists/{}'.format(artist_id()), None),
+    ('api_shows', 'GET', '/api/v1/shows', None),
+    ('create_venue_submission', 'POST', '/venues/create', lambda: {
+      'name': 'Bench Venue', 'city': 'Austin', 'state': 'TX', 'address': '1 Bench Road',
+      'phone': '555-000-0000', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/bench'}),
+    ('create_artist_submission', 'POST', '/artists/create', lambda: {
+      'name': 'Bench Artist', 'city': 'Austin', 'state': 'TX',
+      'phone': '555-000-0000', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/bench'}),
+    ('create_show_submission', 'POST', '/shows/create', lambda: {
+      'artist_id': artist_id(), 'venue_id': venue_id(), 'start_time': '2030-01-01 20:00:00'}),
+    ('edit_artist_submission', 'POST', lambda: '/artists/{}/edit'.format(artist_id()), lambda: {
+      'name': 'Edited Artist', 'city': 'Austin', 'state': 'TX',
+      'phone': '555-000-0000', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/bench'}),
+    ('edit_venue_submission', 'POST', lambda: '/venues/{}/edit'.format(venue_id()), lambda: {
+      'name': 'Edited Venue', 'city': 'Austin', 'state': 'TX', 'address': '1 Bench Road',
+      'phone': '555-000-0000', 'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/bench'}),
+  ]
+
+def run_route(client, method, url, data, count):
+  timings = []
+  queries = []
+  for i in range(count + 1):
+    path = url() if callable(url) else url
+    form = data() if callable(data) else data
+    start = time.perf_counter()
+    response = client.open(path, method=method, data=form)
+    elapsed = time.perf_counter() - start
+    if response.status_code >= 500:
+      raise RuntimeError('{} {} returned {}'.format(method, path, response.status_code))
+    # the first request warms up caches and is not counted
+    if i == 0:
+      continue
+    timings.append(elapsed * 1000)
+    match = QUERIES.search(', '.join(response.headers.getlist('Server-Timing')))
+    if match:
+      queries.append(int(match.group(1)))
+  timings.sort()
+  return {
+    "p50_ms": percentile(timings, 0.50),
+    "p95_ms": percentile(timings, 0.95),
+    "p99_ms": percentile(timings, 0.99),
+    "queries": max(queries) if queries else None
+  }
+
+def main(argv=None):
+  args = parse_args(argv if argv is not None else sys.argv[1:])
+
+  # the app writes error.log to the working directory, keep it (and the sqlite file) out of the repo
+  temp_dir = tempfile.TemporaryDirectory(prefix='fyyur-bench-')
+  if not args.database_url:
+    args.database_url = 'sqlite:///' + os.path.join(temp_dir.name, 'bench.db')
+  # relative paths are meant from where the benchmark was started, not from the temporary directory
+  args.database_url = absolute_sqlite_url(args.database_url)
+  if args.json_path:
+    args.json_path = os.path.abspath(args.json_path)
+
+  # config.py reads DATABASE_URL, it has to be set before the app is imported
+  os.environ['DATABASE_URL'] = args.database_url
+  sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  os.chdir(temp_dir.name)
+  from app import create_app
+  from models import db, Venue, Artist, Show
+  from counters import recount_show_counts
+  # flask_wtf installs an 'always' filter of its own when it is imported, do that now
+  # so the filter below stays in place: deprecation warnings of the form libraries would drown the report
+  import forms
+  warnings.simplefilter('ignore')
+  import datagen
+
+  app = create_app()
+  with app.app_context():
+    if args.reset:
+      db.drop_all()
+    db.create_all()
+    if db.session.query(Venue.id).first() is not None:
+      sys.exit('{} is not empty, pass --reset to recreate its tables'.format(args.database_url))
+
+    start = time.perf_counter()
+    datagen.generate(db, Venue, Artist, Show, args.venues, args.artists, args.shows, area_count=10, seed=args.seed, now=args.anchor_date)
+    recount_show_counts(datetime.now())
+    print('seeded {} venues, {} artists, {} shows in {:.1f}s'.format(args.venues, args.artists, args.shows, time.perf_counter() - start))
+
+  rng = random.Random(args.seed)
+  client = app.test_client()
+  results = {}
+  print('{:<26} {:>9} {:>9} {:>9} {:>8}'.format('route', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'))
+  for name, method, url, data in routes(rng, args):
+    result = results[name] = run_route(client, method, url, data, args.requests)
+    print('{:<26} {:>9.2f} {:>9.2f} {:>9.2f} {:>8}'.format(
+      name, result['p50_ms'], result['p95_ms'], result['p99_ms'], '-' if result['queries'] is None else result['queries']))
+
+  # ru_maxrss is in kilobytes on linux
+  peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+  print('peak rss: {:.1f} MB'.format(peak_rss_mb))
+
+  if args.json_path:
+    with open(args.json_path, 'w') as output:
+      json.dump({"routes": results, "peak_rss_mb": peak_rss_mb, "args": vars(args)}, output, indent=2, default=str)
+
+  temp_dir.cleanup()
+
+  if args.max_p95_ms is not None:
+    slow = [name for name, result in results.items() if result['p95_ms'] > args.max_p95_ms]
+    if slow:
+      print('p95 above {}ms: {}'.format(args.max_p95_ms, ', '.join(slow)))
+      return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
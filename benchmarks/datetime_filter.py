@@ -0,0 +1,81 @@
+#----------------------------------------------------------------------------#
+# Datetime filter micro-benchmark.
+#
+# Formats a listing's worth of show start times the way the templates do and
+# compares the old path (strftime in the view, dateutil parse + babel format
+# in the filter) with format_datetime on datetimes, with an empty and a warm
+# memo.
+#
+#   python -m benchmarks.datetime_filter
+#   python -m benchmarks.datetime_filter --calls 100000 --distinct 20000
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.datetime_filter', description='Time the datetime template filter.')
+  parser.add_argument('--calls', type=int, default=20000, help='filter calls per round')
+  parser.add_argument('--distinct', type=int, default=2000, help='distinct start times among them')
+  parser.add_argument('--rounds', type=int, default=5, help='best of this many rounds is reported')
+  parser.add_argument('--format', default='full', help='filter argument, the templates use full')
+  parser.add_argument('--seed', type=int, default=0)
+  return parser.parse_args(argv)
+
+def best_of(rounds, run, setup=None):
+  # fastest round in seconds, setup() runs untimed before each round
+  timings = []
+  for _ in range(rounds):
+    if setup is not None:
+      setup()
+    start = time.perf_counter()
+    run()
+    timings.append(time.perf_counter() - start)
+  return min(timings)
+
+def main(argv=None):
+  args = parse_args(argv if argv is not None else sys.argv[1:])
+
+  # the filter module alone, no app (and so no database) is needed
+  sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  import filters
+  import babel.dates
+  import dateutil.parser
+
+  # start times at minute resolution like the generated data, popular ones repeating
+  rng = random.Random(args.seed)
+  now = datetime.now().replace(second=0, microsecond=0)
+  distinct = [now + timedelta(minutes=rng.randint(-525600, 525600)) for _ in range(args.distinct)]
+  values = [rng.choice(distinct) for _ in range(args.calls)]
+  pattern = filters.DATETIME_FORMATS.get(args.format, args.format)
+
+  def before():
+    # what the views and the filter did per show: strftime, parse it back, format
+    for value in values:
+      babel.dates.format_datetime(dateutil.parser.parse(value.strftime('%Y-%m-%d %H:%M:%S')), pattern)
+
+  def after():
+    for value in values:
+      filters.format_datetime(value, args.format)
+
+  results = [
+    ('strftime + parse + format', best_of(args.rounds, before)),
+    ('datetime, empty memo', best_of(args.rounds, after, filters.format_datetime_memo.cache_clear)),
+    ('datetime, warm memo', best_of(args.rounds, after))
+  ]
+
+  print('{} calls, {} distinct start times, format {!r}'.format(args.calls, args.distinct, args.format))
+  print('{:<28} {:>10} {:>10} {:>9}'.format('', 'total ms', 'us/call', 'speedup'))
+  for name, seconds in results:
+    print('{:<28} {:>10.1f} {:>10.2f} {:>8.1f}x'.format(name, seconds * 1000, seconds * 1e6 / args.calls, results[0][1] / seconds))
+
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,123 @@
+#----------------------------------------------------------------------------#
+# Import-time benchmark.
+#
+# Starts fresh interpreters under `python -X importtime` and reports what a
+# cold start costs: importing app.py, creating the app and serving a first
+# request. Also lists the slowest imports and which of the libraries the app
+# only loads on first use (babel, dateutil, WTForms, flask_migrate) each
+# stage pulled in.
+#
+#   python -m benchmarks.importtime
+#   python -m benchmarks.importtime --runs 20 --top 15
+#   python -m benchmarks.importtime --max-ms 400     # exit 1 if create_app is slower (deploy gate)
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# stage name -> statement timed in the fresh interpreter
+STAGES = (
+  ('import app', 'import app'),
+  ('create_app()', 'import app; app.create_app()'),
+  ('first request', "import app; app.create_app().test_client().get('/')"),
+)
+# libraries that should not be loaded before something needs them
+DEFERRED = ('babel', 'dateutil', 'wtforms', 'flask_wtf', 'flask_migrate', 'alembic', 'flask_moment', 'redis')
+
+TIMED = '''
+import time
+start = time.perf_counter()
+{}
+print(time.perf_counter() - start)
+'''
+
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.importtime', description='Measure the cold start cost of the app.')
+  parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per stage, the median is reported')
+  parser.add_argument('--top', type=int, default=10, help='slowest top-level imports listed per stage')
+  parser.add_argument('--max-ms', type=float, help='exit with status 1 when the median create_app() time is above this')
+  parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+  return parser.parse_args(argv)
+
+def parse_importtime(output):
+  # [(module, self us, cumulative us, nesting level)] of the lines -X importtime writes to stderr
+  imports = []
+  for line in output.splitlines():
+    if not line.startswith('import time:') or 'imported package' in line:
+      continue
+    self_us, cumulative_us, name = line[len('import time:'):].split('|')
+    level = (len(name) - len(name.lstrip())) // 2
+    imports.append((name.strip(), int(self_us), int(cumulative_us), level))
+  return imports
+
+def run_stage(statement, cwd, env):
+  # (seconds the statement took, imports) in a new interpreter
+  process = subprocess.run([sys.executable, '-X', 'importtime', '-c', TIMED.format(statement)],
+    cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+  if process.returncode != 0:
+    sys.exit('`{}` failed:\n{}'.format(statement, process.stderr[-2000:]))
+  return float(process.stdout.strip().splitlines()[-1]), parse_importtime(process.stderr)
+
+def main(argv=None):
+  args = parse_args(argv if argv is not None else sys.argv[1:])
+
+  # run next to a throwaway database and error.log, the app itself comes from PYTHONPATH
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  temp_dir = tempfile.TemporaryDirectory(prefix='fyyur-bench-')
+  env = dict(os.environ,
+    PYTHONPATH=os.pathsep.join([root] + [path for path in [os.environ.get('PYTHONPATH')] if path]),
+    DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(temp_dir.name, 'bench.db')),
+    PYTHONWARNINGS='ignore')
+
+  results = {}
+  for name, statement in STAGES:
+    # untimed first run, it may have to write the .pyc files
+    run_stage(statement, temp_dir.name, env)
+    timings = []
+    for _ in range(args.runs):
+      seconds, imports = run_stage(statement, temp_dir.name, env)
+      timings.append(seconds * 1000)
+    modules = set(module for module, _, _, _ in imports)
+    results[name] = {
+      "median_ms": statistics.median(timings),
+      "min_ms": min(timings),
+      "modules": len(modules),
+      # import time of the last run, the sum of the self times of every module it imported
+      "import_ms": sum(self_us for _, self_us, _, _ in imports) / 1000.0,
+      "loaded": [library for library in DEFERRED if library in modules],
+      # top-level modules and packages with everything they imported, slowest first
+      "slowest": [(module, cumulative_us / 1000.0) for module, _, cumulative_us, _ in
+        sorted(imports, key=lambda entry: -entry[2]) if '.' not in module][:args.top]
+    }
+
+  print('{} runs per stage, {}'.format(args.runs, sys.version.split()[0]))
+  print('{:<16} {:>10} {:>10} {:>10} {:>8}  {}'.format('stage', 'median ms', 'min ms', 'import ms', 'modules', 'deferred libraries loaded'))
+  for name, _ in STAGES:
+    result = results[name]
+    print('{:<16} {:>10.1f} {:>10.1f} {:>10.1f} {:>8}  {}'.format(
+      name, result['median_ms'], result['min_ms'], result['import_ms'], result['modules'], ', '.join(result['loaded']) or '-'))
+  for name, _ in STAGES:
+    print('\nslowest imports, {}:'.format(name))
+    for module, milliseconds in results[name]['slowest']:
+      print('  {:>8.1f} ms  {}'.format(milliseconds, module))
+
+  if args.json_path:
+    with open(args.json_path, 'w') as output:
+      json.dump({"stages": results, "python": sys.version, "args": vars(args)}, output, indent=2)
+
+  temp_dir.cleanup()
+
+  if args.max_ms is not None and results['create_app()']['median_ms'] > args.max_ms:
+    print('create_app() took {:.1f}ms, above {}ms'.format(results['create_app()']['median_ms'], args.max_ms))
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,167 @@
+#----------------------------------------------------------------------------#
+# Query overhead micro-benchmark.
+#
+# Runs the queries behind show_venue() and search_artists() the way a request
+# does (then drops the session, like the request teardown) with the Query
+# code they used before queries.py and with the lambda_stmt() statements of
+# queries.py. Time spent inside the database driver is measured separately,
+# what is left is the Python cost of building, compiling and loading.
+#
+#   python -m benchmarks.query_overhead
+#   python -m benchmarks.query_overhead --calls 5000 --shows 50000
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import warnings
+from datetime import datetime
+
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.query_overhead', description='Time the Python overhead of the hot queries.')
+  parser.add_argument('--venues', type=int, default=200)
+  parser.add_argument('--artists', type=int, default=500)
+  parser.add_argument('--shows', type=int, default=5000)
+  parser.add_argument('--calls', type=int, default=1000, help='calls per round')
+  parser.add_argument('--rounds', type=int, default=3, help='best of this many rounds is reported')
+  parser.add_argument('--seed', type=int, default=0)
+  return parser.parse_args(argv)
+
+def legacy_queries(db, Venue, Artist, Show):
+  # the Query versions of the hot paths, as app.py had them
+  from sqlalchemy import func
+  from sqlalchemy.orm import load_only, contains_eager
+
+  def page_validator(entity, other, show_column, entity_id, now):
+    return db.session.query(
+        entity.updated_at,
+        func.max(Show.updated_at),
+        func.max(other.updated_at),
+        func.count(Show.id),
+        func.max(Show.start_time).filter(Show.start_time <= now)
+      ).outerjoin(Show, show_column == entity.id) \
+      .outerjoin(other, other.id == (Show.artist_id if other is Artist else Show.venue_id)) \
+      .filter(entity.id == entity_id) \
+      .group_by(entity.id) \
+      .first()
+
+  def show_venue(venue_id, now):
+    page_validator(Venue, Artist, Show.venue_id, venue_id, now)
+    Venue.query.get(venue_id)
+    return db.session.query(Show) \
+      .join(Artist) \
+      .filter(Show.venue_id == venue_id) \
+      .options(
+        load_only(Show.id, Show.artist_id, Show.start_time),
+        contains_eager(Show.artist).load_only(Artist.id, Artist.name, Artist.image_link)) \
+      .order_by(Show.start_time).all()
+
+  def search_artists(search_term, now):
+    return db.session.query(Artist.id, Artist.name, Artist.upcoming_shows_count) \
+      .filter(Artist.name.ilike(f'%{search_term}%')) \
+      .order_by(Artist.name, Artist.id) \
+      .limit(50).all()
+
+  return show_venue, search_artists
+
+def current_queries(db, Venue, Artist, queries):
+  # the same work through queries.py
+  def show_venue(venue_id, now):
+    queries.venue_validator(venue_id, now)
+    db.session.get(Venue, venue_id)
+    return queries.venue_shows(venue_id)
+
+  def search_artists(search_term, now):
+    return queries.search_by_name(Artist, search_term)
+
+  return show_venue, search_artists
+
+def main(argv=None):
+  args = parse_args(argv if argv is not None else sys.argv[1:])
+
+  # the app writes error.log to the working directory, keep it (and the sqlite file) out of the repo
+  temp_dir = tempfile.TemporaryDirectory(prefix='fyyur-bench-')
+  os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(temp_dir.name, 'bench.db')
+  sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  os.chdir(temp_dir.name)
+  from sqlalchemy import event
+  from sqlalchemy.pool import QueuePool
+  from config import DB_QUERY_CACHE_SIZE
+  from app import create_app
+  from models import db, Venue, Artist, Show
+  from counters import recount_show_counts
+  import queries
+  import datagen
+  warnings.simplefilter('ignore')
+
+  # pooled like the postgres engines, sqlite files would get a new connection per session
+  app = create_app({'SQLALCHEMY_ENGINE_OPTIONS': {'poolclass': QueuePool, 'query_cache_size': DB_QUERY_CACHE_SIZE}})
+  with app.app_context():
+    db.create_all()
+    datagen.generate(db, Venue, Artist, Show, args.venues, args.artists, args.shows, area_count=10, seed=args.seed)
+    recount_show_counts(datetime.now())
+
+    # seconds spent in the driver and statements compiled, from the engine events
+    stats = {"db": 0.0, "compiled": 0}
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+      conn.info['bench_start'] = time.perf_counter()
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+      stats['db'] += time.perf_counter() - conn.info.pop('bench_start')
+      if context is not None and context.cache_hit == context.dialect.CACHE_MISS:
+        stats['compiled'] += 1
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    event.listen(db.engine, 'after_cursor_execute', after_execute)
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    names = [name for name, in db.session.query(Artist.name).limit(200)]
+    scenario_args = {
+      "show_venue": [rng.randint(1, args.venues) for _ in range(args.calls)],
+      # a word out of an artist name, the way people search
+      "search_artists": [rng.choice(rng.choice(names).split()) for _ in range(args.calls)]
+    }
+    implementations = (
+      ('Query', dict(zip(scenario_args, legacy_queries(db, Venue, Artist, Show)))),
+      ('lambda_stmt', dict(zip(scenario_args, current_queries(db, Venue, Artist, queries))))
+    )
+
+    def run(function, values):
+      for value in values:
+        function(value, now)
+        db.session.remove()
+
+    results = {}
+    for scenario, values in scenario_args.items():
+      for name, functions in implementations:
+        # first calls analyze the lambdas and fill the compiled cache, not timed
+        run(functions[scenario], values[:50])
+        best = None
+        for _ in range(args.rounds):
+          stats.update(db=0.0, compiled=0)
+          start = time.perf_counter()
+          run(functions[scenario], values)
+          total = time.perf_counter() - start
+          if best is None or total < best[0]:
+            best = (total, stats['db'], stats['compiled'])
+        results[scenario, name] = best
+
+  print('{} venues, {} artists, {} shows, {} calls per round, best of {}'.format(args.venues, args.artists, args.shows, args.calls, args.rounds))
+  print('{:<16} {:<12} {:>10} {:>10} {:>10} {:>9} {:>10}'.format('scenario', '', 'total us', 'db us', 'python us', 'compiled', 'python x'))
+  for scenario in scenario_args:
+    python_before = results[scenario, 'Query'][0] - results[scenario, 'Query'][1]
+    for name, _ in implementations:
+      total, db_seconds, compiled = results[scenario, name]
+      python = total - db_seconds
+      print('{:<16} {:<12} {:>10.1f} {:>10.1f} {:>10.1f} {:>9} {:>9.2f}x'.format(
+        scenario, name, total * 1e6 / args.calls, db_seconds * 1e6 / args.calls, python * 1e6 / args.calls, compiled, python_before / python))
+
+  temp_dir.cleanup()
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,127 @@
+#----------------------------------------------------------------------------#
+# Page cache.
+#
+# Keeps the rendered html of the venue and artist pages so repeat views skip
+# the queries and the template. Entries are removed by the views that change
+# what a page shows and expire on their own when an upcoming show turns into
+# a past one.
+#
+# Two backends: an in-process LRU (the default, one cache per worker process)
+# and a Redis-protocol server shared by all workers. An edit only clears the
+# memory cache of the worker serving it, so pages are stored with the ETag
+# they were rendered for and only served for that ETag (responses.py): other
+# workers render the page again instead of serving the old one. With several
+# workers redis still saves each of them rendering every page once.
+#----------------------------------------------------------------------------#
+
+import time
+import threading
+from collections import OrderedDict
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+
+class MemoryCache(object):
+  # least recently used entries are dropped once max_entries is reached
+
+  def __init__(self, max_entries, default_ttl):
+    self.max_entries = max_entries
+    self.default_ttl = default_ttl
+    # key -> (expires at, value), oldest first
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      if entry[0] <= time.monotonic():
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return entry[1]
+
+  def set(self, key, value, ttl=None):
+    expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+    with self._lock:
+      self._entries[key] = (expires, value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def delete(self, *keys):
+    with self._lock:
+      for key in keys:
+        self._entries.pop(key, None)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+
+class RedisCache(object):
+  # any server speaking the redis protocol, keys are namespaced with <prefix>
+
+  def __init__(self, url, default_ttl, prefix='fyyur:page:'):
+    # imported here, processes using another backend never load it
+    try:
+      import redis
+    except ImportError:
+      raise RuntimeError("CACHE_BACKEND = 'redis' needs the redis package (pip install redis)")
+    self.client = redis.Redis.from_url(url)
+    self.default_ttl = default_ttl
+    self.prefix = prefix
+
+  def get(self, key):
+    value = self.client.get(self.prefix + key)
+    return value.decode('utf-8') if value is not None else None
+
+  def set(self, key, value, ttl=None):
+    # redis expiries are whole seconds
+    ttl = self.default_ttl if ttl is None else ttl
+    self.client.set(self.prefix + key, value.encode('utf-8'), ex=max(1, int(ttl)))
+
+  def delete(self, *keys):
+    if keys:
+      self.client.delete(*[self.prefix + key for key in keys])
+
+  def clear(self):
+    keys = list(self.client.scan_iter(self.prefix + '*'))
+    if keys:
+      self.client.delete(*keys)
+
+
+class NullCache(object):
+  # CACHE_BACKEND = 'none', every lookup misses
+
+  def get(self, key):
+    return None
+
+  def set(self, key, value, ttl=None):
+    pass
+
+  def delete(self, *keys):
+    pass
+
+  def clear(self):
+    pass
+
+
+def from_config(config):
+  backend = config['CACHE_BACKEND']
+  if backend == 'memory':
+    return MemoryCache(config['CACHE_MAX_ENTRIES'], config['CACHE_TTL'])
+  if backend == 'redis':
+    return RedisCache(config['CACHE_REDIS_URL'], config['CACHE_TTL'])
+  if backend == 'none':
+    return NullCache()
+  raise ValueError("unknown CACHE_BACKEND '{}', use memory, redis or none".format(backend))
+
+
+def init_app(app):
+  # the page cache of app, reached through page_cache while one of its contexts is active
+  app.extensions['page_cache'] = from_config(app.config)
+  return app.extensions['page_cache']
+
+page_cache = LocalProxy(lambda: current_app.extensions['page_cache'])
@@ -0,0 +1,126 @@
+#----------------------------------------------------------------------------#
+# Commands.
+# registered on app.cli by create_app(), they run inside an app context
+#----------------------------------------------------------------------------#
+
+import time
+import signal
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from config import JOB_SCHEDULE, JOB_THREADS
+import datagen
+import importer
+import exporter
+import jobs
+from models import db, Venue, Artist, Show, Job
+from counters import refresh_show_counts, recount_show_counts
+from transfer import IMPORT_KINDS, EXPORT_TABLES, import_file
+from tasks import job_worker
+
+@click.command('generate-data')
+@with_appcontext
+@click.option('--venues', default=1000, show_default=True)
+@click.option('--artists', default=5000, show_default=True)
+@click.option('--shows', default=100000, show_default=True)
+@click.option('--areas', default=50, show_default=True, help='number of city/state areas')
+@click.option('--seed', default=0, show_default=True, help='same seed and anchor date => same data')
+@click.option('--anchor-date', type=click.DateTime(formats=['%Y-%m-%d']), help='day the show start times are spread around [default: today]')
+@click.option('--reset', is_flag=True, help='drop and recreate all tables first')
+def generate_data(venues, artists, shows, areas, seed, anchor_date, reset):
+  # flask generate-data --shows 10000000
+  """Bulk-generate synthetic venues, artists and shows for scale testing."""
+  if reset:
+    db.drop_all()
+    db.create_all()
+  if db.session.query(Venue.id).first() is not None:
+    raise click.ClickException('the venue table is not empty, use --reset to start from scratch')
+
+  datagen.generate(db, Venue, Artist, Show, venues, artists, shows, area_count=areas, seed=seed, now=anchor_date, log=click.echo)
+  recount_show_counts(datetime.now())
+
+@click.command('import-data')
+@with_appcontext
+@click.argument('kind', type=click.Choice(sorted(IMPORT_KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(sorted(importer.READERS)), help='defaults to the file extension')
+@click.option('--batch-size', default=importer.BATCH_SIZE, show_default=True)
+def import_data_command(kind, path, fmt, batch_size):
+  # flask import-data shows shows.ndjson
+  """Bulk import venues, artists or shows from a CSV or NDJSON file."""
+  fmt = fmt or path.rsplit('.', 1)[-1].lower()
+  if fmt not in importer.READERS:
+    raise click.BadParameter("can not tell the format from the file name, pass --format", param_hint='--format')
+
+  with open(path, 'rb') as stream:
+    report = import_file(kind, stream, fmt, batch_size)
+
+  click.echo('{} rows read, {} imported, {} invalid, {} failed batches'.format(
+    report['rows'], report['imported'], report['invalid'], len(report['failed_batches'])))
+  for error in report['errors']:
+    click.echo('line {}: {}'.format(error['line'], error['errors']), err=True)
+  for batch in report['failed_batches']:
+    click.echo('lines {}-{}: batch of {} rows failed: {}'.format(batch['first_line'], batch['last_line'], batch['rows'], batch['error']), err=True)
+
+@click.command('refresh-counters')
+@with_appcontext
+@click.option('--full', is_flag=True, help='recount everything from the show table instead of moving started shows')
+@click.option('--every', type=float, help='keep running, refreshing every this many seconds')
+def refresh_counters(full, every):
+  # flask refresh-counters --every 60 (or from cron, once a minute)
+  """Move shows that have started from the upcoming to the past counters."""
+  while True:
+    if full:
+      recount_show_counts(datetime.now())
+      click.echo('recounted upcoming/past shows')
+    else:
+      click.echo('{} shows moved from upcoming to past'.format(refresh_show_counts(datetime.now())))
+    if every is None:
+      break
+    db.session.remove()
+    time.sleep(every)
+
+@click.command('worker')
+@with_appcontext
+@click.option('--threads', default=JOB_THREADS, show_default=True)
+@click.option('--once', is_flag=True, help='run the jobs that are due and exit')
+def worker(threads, once):
+  # flask worker (several can run side by side, on one machine or many)
+  """Run queued and periodic background jobs."""
+  job_runner = job_worker(current_app._get_current_object(), threads)
+  if once:
+    click.echo('{} jobs run'.format(job_runner.run_due()))
+    return
+  # running jobs are finished on ctrl-c / SIGTERM
+  signal.signal(signal.SIGTERM, lambda signum, frame: job_runner.stop())
+  signal.signal(signal.SIGINT, lambda signum, frame: job_runner.stop())
+  click.echo('worker running {} on {} threads'.format(', '.join(sorted(JOB_SCHEDULE)) or 'queued jobs', threads))
+  job_runner.run()
+
+@click.command('enqueue')
+@with_appcontext
+@click.argument('task', type=click.Choice(sorted(jobs.TASKS)))
+@click.option('--delay', default=0.0, help='seconds from now')
+def enqueue_command(task, delay):
+  # flask enqueue warm-page-cache
+  """Queue a one-off background job."""
+  job_id = jobs.enqueue(db, Job, task, run_at=datetime.now() + timedelta(seconds=delay))
+  click.echo('queued job {}'.format(job_id))
+
+@click.command('export-data')
+@with_appcontext
+@click.argument('kind', type=click.Choice(sorted(EXPORT_TABLES)))
+@click.option('--format', 'fmt', type=click.Choice(sorted(exporter.FORMATS)), default='csv', show_default=True)
+@click.option('--output', '-o', type=click.File('w'), default='-', help='defaults to stdout')
+def export_data_command(kind, fmt, output):
+  # flask export-data shows --format ndjson -o shows.ndjson
+  """Stream all venues, artists or shows out as CSV or NDJSON."""
+  for piece in exporter.export(db, EXPORT_TABLES[kind], fmt):
+    output.write(piece)
+
+COMMANDS = (generate_data, import_data_command, refresh_counters, worker, enqueue_command, export_data_command)
+
+def init_app(app):
+  for command in COMMANDS:
+    app.cli.add_command(command)
@@ -0,0 +1,85 @@
+#----------------------------------------------------------------------------#
+# Show counters.
+# upcoming_shows_count/past_shows_count of venues and artists are kept up to date when
+# shows are created and moved from upcoming to past by `flask refresh-counters`, so the
+# listings read them as plain columns. they are exact as of the last refresh.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from sqlalchemy import select, func, and_
+from models import db, Venue, Artist, Show, ShowCounterState
+
+# counted models and the show column pointing at them
+COUNTED_MODELS = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+def counter_state(read=False):
+  # the checkpoint row, locked for the rest of the transaction: refreshes take it exclusively,
+  # new shows shared, so a show is never classified against a checkpoint that is being moved
+  state = ShowCounterState.query.with_for_update(read=read).filter_by(id=1).first()
+  if state is None:
+    # no checkpoint yet (tables made by db.create_all): count everything, in the caller's transaction.
+    # callers adding a show do it before the show is in the session, so it is not counted twice
+    state = count_all_shows(datetime.now())
+  return state
+
+def adjust_show_counts(venue_id, artist_id, start_time, delta):
+  # +1 (created) or -1 (deleted) show for its venue and artist, in the caller's transaction
+  state = counter_state(read=True)
+  name = 'upcoming_shows_count' if start_time > state.counted_at else 'past_shows_count'
+  for model, entity_id in ((Venue, venue_id), (Artist, artist_id)):
+    column = getattr(model, name)
+    # counters are not part of what a page shows as modified, updated_at (etags, cached pages) stays as it is
+    db.session.query(model).filter(model.id == entity_id) \
+      .update({column: column + delta, model.updated_at: model.updated_at}, synchronize_session=False)
+
+def refresh_show_counts(now):
+  # move the shows that started since the last refresh from upcoming to past.
+  # only venues/artists with such shows are updated, returns the number of shows moved
+  state = counter_state()
+  if now <= state.counted_at:
+    # still commit the checkpoint counter_state may just have created
+    db.session.commit()
+    return 0
+
+  started = and_(Show.start_time > state.counted_at, Show.start_time <= now)
+  moved = db.session.query(func.count(Show.id)).filter(started).scalar()
+  if moved:
+    for model, show_column in COUNTED_MODELS:
+      table = model.__table__
+      # correlated subquery rather than UPDATE ... FROM, which sqlite (local benchmarks) lacks
+      moved_here = select(func.count(Show.id)).where(and_(show_column == table.c.id, started)).scalar_subquery()
+      db.session.execute(table.update()
+        .where(table.c.id.in_(select(show_column).where(started)))
+        .values(upcoming_shows_count=table.c.upcoming_shows_count - moved_here,
+                past_shows_count=table.c.past_shows_count + moved_here,
+                # keep the onupdate of updated_at from firing, see adjust_show_counts
+                updated_at=table.c.updated_at))
+
+  state.counted_at = now
+  db.session.commit()
+  return moved
+
+def recount_show_counts(now):
+  # recompute every counter from the show table, needed after writes that bypass adjust_show_counts
+  # (bulk imports, generated data). O(shows), unlike refresh_show_counts
+  state = count_all_shows(now)
+  db.session.commit()
+  return state
+
+def count_all_shows(now):
+  # recount_show_counts without the commit, returns the checkpoint row
+  state = ShowCounterState.query.with_for_update().filter_by(id=1).first()
+  if state is None:
+    state = ShowCounterState(id=1, counted_at=now)
+    db.session.add(state)
+
+  for model, show_column in COUNTED_MODELS:
+    table = model.__table__
+    count = lambda condition: select(func.count(Show.id)).where(and_(show_column == table.c.id, condition)).scalar_subquery()
+    db.session.execute(table.update().values(
+      upcoming_shows_count=count(Show.start_time > now),
+      past_shows_count=count(Show.start_time <= now),
+      updated_at=table.c.updated_at))
+
+  state.counted_at = now
+  return state
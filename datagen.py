@@ -0,0 +1,195 @@
+#----------------------------------------------------------------------------#
+# Synthetic data generator.
+#
+# Fills the venue, artist and show tables with realistic looking volumes for
+# scale testing: areas get a power-law number of venues, shows are skewed
+# towards popular venues and artists, and artists play several genres.
+# The same arguments (on the same day) always produce the same rows.
+#
+# Rows are generated and written in batches, through COPY on postgres
+# (psycopg2) and executemany everywhere else, so memory stays flat and
+# millions of shows load in minutes.
+#----------------------------------------------------------------------------#
+
+import io
+import csv
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+CITIES = [('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'), ('Seattle', 'WA'), ('Chicago', 'IL'),
+          ('Nashville', 'TN'), ('Denver', 'CO'), ('Portland', 'OR'), ('Boston', 'MA'), ('Miami', 'FL'),
+          ('Los Angeles', 'CA'), ('New Orleans', 'LA'), ('Atlanta', 'GA'), ('Detroit', 'MI'), ('Philadelphia', 'PA')]
+STATES = ['AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS',
+          'KY', 'LA', 'ME', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'MD', 'MA',
+          'MI', 'MN', 'MS', 'MO', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY']
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk', 'Hip-Hop',
+          'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae',
+          'Rock n Roll', 'Soul', 'Other']
+WORDS = ['Musical', 'Hop', 'Park', 'Square', 'Live', 'Music', 'Coffee', 'Dueling', 'Pianos', 'Bar',
+         'Guns', 'Petals', 'Wild', 'Sax', 'Band', 'Matt', 'Quevado', 'Blue', 'Note', 'Velvet',
+         'Echo', 'Lounge', 'Hall', 'Garden', 'Cellar', 'Neon', 'Harbor', 'Electric', 'Moon', 'River']
+
+# rows generated and written per batch
+BATCH_SIZE = 50000
+
+
+def zipf_cum_weights(count, exponent):
+  # cumulative weights of a power-law (zipf) distribution over <count> items, item 0 the most popular
+  return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def areas(count):
+  # real cities first, then made up ones
+  result = list(CITIES[:count])
+  for index in range(len(result), count):
+    result.append(('City {}'.format(index + 1), STATES[index % len(STATES)]))
+  return result
+
+def _name(rng, index):
+  return '{} {} {}'.format(rng.choice(WORDS), rng.choice(WORDS), index)
+
+def _phone(rng):
+  return '{}-{}-{}'.format(rng.randint(200, 999), rng.randint(100, 999), rng.randint(1000, 9999))
+
+def _genres(rng):
+  # most artists/venues play one or two genres, a few play many
+  return rng.sample(GENRES, min(len(GENRES), 1 + int(rng.expovariate(1.0))))
+
+def venue_rows(rng, count, area_list, exponent):
+  # venue counts per area follow a power law: a few big cities hold most venues
+  area_weights = zipf_cum_weights(len(area_list), exponent)
+  for venue_id in range(1, count + 1):
+    city, state = rng.choices(area_list, cum_weights=area_weights)[0]
+    yield {
+      "id": venue_id,
+      "name": _name(rng, venue_id),
+      "city": city,
+      "state": state,
+      "address": '{} {} Street'.format(rng.randint(1, 9999), rng.choice(WORDS)),
+      "phone": _phone(rng),
+      "image_link": 'https://example.com/venues/{}.jpg'.format(venue_id),
+      "facebook_link": 'https://www.facebook.com/venue{}'.format(venue_id),
+      "genres": _genres(rng),
+      "website": 'https://example.com/venues/{}'.format(venue_id),
+      "seeking_talent": rng.random() < 0.3,
+      "seeking_description": ''
+    }
+
+def artist_rows(rng, count, area_list):
+  for artist_id in range(1, count + 1):
+    city, state = rng.choice(area_list)
+    yield {
+      "id": artist_id,
+      "name": _name(rng, artist_id),
+      "city": city,
+      "state": state,
+      "phone": _phone(rng),
+      "image_link": 'https://example.com/artists/{}.jpg'.format(artist_id),
+      "facebook_link": 'https://www.facebook.com/artist{}'.format(artist_id),
+      "genres": _genres(rng),
+      "website": 'https://example.com/artists/{}'.format(artist_id),
+      "seeking_venue": rng.random() < 0.3,
+      "seeking_description": ''
+    }
+
+def show_rows(rng, count, venues, artists, now, exponent, days):
+  # shows go mostly to popular venues/artists and are spread over <days> before and after <now>
+  venue_weights = zipf_cum_weights(venues, exponent)
+  artist_weights = zipf_cum_weights(artists, exponent)
+  venue_ids = range(1, venues + 1)
+  artist_ids = range(1, artists + 1)
+  minutes = days * 24 * 60
+
+  show_id = 0
+  while show_id < count:
+    size = min(BATCH_SIZE, count - show_id)
+    # drawing a whole batch at once is much faster than one choice per show
+    batch_venues = rng.choices(venue_ids, cum_weights=venue_weights, k=size)
+    batch_artists = rng.choices(artist_ids, cum_weights=artist_weights, k=size)
+    for venue_id, artist_id in zip(batch_venues, batch_artists):
+      show_id += 1
+      yield {
+        "id": show_id,
+        "venue_id": venue_id,
+        "artist_id": artist_id,
+        "start_time": now + timedelta(minutes=rng.randint(-minutes, minutes))
+      }
+
+
+#----------------------------------------------------------------------------#
+# Writers.
+#----------------------------------------------------------------------------#
+
+def _batches(rows, size):
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) == size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+def _pg_array(values):
+  # postgres array literal, every element quoted
+  return '{' + ','.join('"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values) + '}'
+
+def _copy(raw_connection, table, columns, batch):
+  # one COPY ... FROM STDIN per batch, rows serialized as csv
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  for row in batch:
+    values = []
+    for column in columns:
+      value = row[column]
+      if isinstance(value, list):
+        value = _pg_array(value)
+      elif value is None:
+        value = '\\N'
+      values.append(value)
+    writer.writerow(values)
+  buffer.seek(0)
+  with raw_connection.cursor() as cursor:
+    cursor.copy_expert('COPY "{}" ({}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'.format(table.name, ', '.join(columns)), buffer)
+
+def write_rows(db, table, rows, batch_size=BATCH_SIZE):
+  # bulk insert rows (dicts with the same keys) into table, returns the number of rows written
+  connection = db.session.connection()
+  raw_connection = connection.connection
+  use_copy = db.session.bind.dialect.driver == 'psycopg2'
+
+  written = 0
+  for batch in _batches(rows, batch_size):
+    if use_copy:
+      _copy(raw_connection, table, list(batch[0].keys()), batch)
+    else:
+      connection.execute(table.insert(), batch)
+    written += len(batch)
+  return written
+
+def reset_sequences(db, tables):
+  # rows are written with explicit ids, move postgres sequences past them
+  if db.session.bind.dialect.name != 'postgresql':
+    return
+  for table in tables:
+    db.session.execute(db.text(
+      "SELECT setval(pg_get_serial_sequence('{0}', 'id'), coalesce(max(id), 1)) FROM \"{0}\"".format(table.name)))
+
+
+def generate(db, Venue, Artist, Show, venues, artists, shows, area_count=50, seed=0, now=None, exponent=1.1, days=365, log=None):
+  # fill the (empty) venue, artist and show tables. the same seed and <now> produce the very same rows,
+  # <now> defaults to today at midnight (pass a fixed one to compare runs of different days)
+  rng = random.Random(seed)
+  now = now or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+  log = log or (lambda message: None)
+  area_list = areas(area_count)
+
+  written = write_rows(db, Venue.__table__, venue_rows(rng, venues, area_list, exponent))
+  log('{} venues'.format(written))
+  written = write_rows(db, Artist.__table__, artist_rows(rng, artists, area_list))
+  log('{} artists'.format(written))
+  written = write_rows(db, Show.__table__, show_rows(rng, shows, venues, artists, now, exponent, days))
+  log('{} shows'.format(written))
+
+  reset_sequences(db, [Venue.__table__, Artist.__table__, Show.__table__])
+  db.session.commit()
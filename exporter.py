@@ -0,0 +1,90 @@
+#----------------------------------------------------------------------------#
+# Bulk export.
+#
+# Streams whole tables out as CSV or NDJSON. Rows are read through a
+# server-side cursor (stream_results + yield_per) and serialized chunk by
+# chunk, so an export of millions of rows runs in constant memory and the
+# first bytes go out before the query has finished.
+# importer.py reads both formats back (lists ';'-separated in CSV), but only
+# the columns the create forms have: id (shows keep their artist_id/venue_id),
+# website, seeking_talent/seeking_venue, seeking_description, updated_at and
+# the show counters of an export are not imported.
+#----------------------------------------------------------------------------#
+
+import io
+import csv
+import json
+from datetime import date, datetime
+from importer import LIST_SEPARATOR
+
+# rows fetched from the cursor at a time
+YIELD_PER = 2000
+# rows serialized into one chunk of output
+CHUNK_ROWS = 500
+# datetimes in json, the format the DateTimeField of forms.ShowForm (and so importer.py) reads back
+JSON_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+FORMATS = {
+  'csv': 'text/csv',
+  'ndjson': 'application/x-ndjson'
+}
+
+
+def stream_rows(db, table):
+  # all rows of table in primary key order, fetched in YIELD_PER sized rounds from a server-side cursor
+  columns = list(table.c)
+  query = db.session.query(*columns) \
+    .order_by(*table.primary_key.columns) \
+    .execution_options(stream_results=True) \
+    .yield_per(YIELD_PER)
+  return [column.name for column in columns], query
+
+def _csv_value(value):
+  # lists (genres) go into one cell, everything else is written as str(value)
+  if isinstance(value, (list, tuple)):
+    return LIST_SEPARATOR.join(str(item) for item in value)
+  return value
+
+def _json_default(value):
+  if isinstance(value, datetime):
+    return value.strftime(JSON_DATETIME_FORMAT)
+  if isinstance(value, date):
+    return value.isoformat()
+  raise TypeError('{!r} is not JSON serializable'.format(value))
+
+def _chunks(rows, size):
+  chunk = []
+  for row in rows:
+    chunk.append(row)
+    if len(chunk) == size:
+      yield chunk
+      chunk = []
+  if chunk:
+    yield chunk
+
+def generate_csv(names, rows):
+  # yields the csv text, header first, CHUNK_ROWS rows per piece
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  writer.writerow(names)
+  yield buffer.getvalue()
+  for chunk in _chunks(rows, CHUNK_ROWS):
+    buffer.seek(0)
+    buffer.truncate()
+    writer.writerows([_csv_value(value) for value in row] for row in chunk)
+    yield buffer.getvalue()
+
+def generate_ndjson(names, rows):
+  # yields one json object per line, CHUNK_ROWS rows per piece
+  for chunk in _chunks(rows, CHUNK_ROWS):
+    yield ''.join(json.dumps(dict(zip(names, row)), default=_json_default) + '\n' for row in chunk)
+
+GENERATORS = {
+  'csv': generate_csv,
+  'ndjson': generate_ndjson
+}
+
+def export(db, table, fmt):
+  # generator of text pieces for the whole table in the given format
+  names, rows = stream_rows(db, table)
+  return GENERATORS[fmt](names, rows)
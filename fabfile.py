@@ -13,6 +13,15 @@ def test():
         abort("Aborted at user request.")
 
 
+def benchmark():
+    # regression gate: seeds a temporary database and fails when a route's p95 is too slow
+    with settings(warn_only=True):
+        result = local("python -m benchmarks --max-p95-ms 250", capture=True)
+    print(result)
+    if result.failed and not confirm("Benchmarks failed. Continue?"):
+        abort("Aborted at user request.")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -24,6 +33,7 @@ def push():
 
 def prepare():
     test()
+    benchmark()
     commit()
     push()
 
@@ -47,6 +57,7 @@ def heroku_test():
 def deploy():
     pull()
     test()
+    benchmark()
     commit()
     heroku()
     heroku_test()
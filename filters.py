@@ -0,0 +1,54 @@
+#----------------------------------------------------------------------------#
+# Template filters.
+#
+# babel (and dateutil, for string values) are imported on the first call,
+# not when the app starts: processes that never render a date do not pay
+# for loading them and their locale data.
+#----------------------------------------------------------------------------#
+
+from functools import lru_cache
+
+# patterns behind our 'full' and 'medium', other values are babel format names ('long', 'short') or patterns
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma"
+}
+# formatted timestamps remembered by the filter, listings repeat the same start times over and over
+DATETIME_MEMO_SIZE = 4096
+
+@lru_cache(maxsize=None)
+def time_locale():
+  # the locale babel would parse again on every call
+  import babel
+  import babel.dates
+  return babel.Locale.parse(babel.dates.LC_TIME)
+
+@lru_cache(maxsize=None)
+def datetime_pattern(format):
+  # compiled babel pattern of a format, None for babel's own format names
+  import babel.dates
+  if format not in DATETIME_FORMATS and format in ('long', 'short'):
+    return None
+  return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+@lru_cache(maxsize=DATETIME_MEMO_SIZE)
+def format_datetime_memo(value, format, locale):
+  import babel.dates
+  pattern = datetime_pattern(format)
+  if pattern is None:
+    return babel.dates.format_datetime(value, format, locale=locale)
+  # babel reads naive datetimes as utc and prints them unchanged
+  if value.tzinfo is None:
+    value = value.replace(tzinfo=babel.dates.UTC)
+  return pattern.apply(value, locale)
+
+def format_datetime(value, format='medium'):
+  # takes datetimes as they come from the database, strings are still parsed for older callers
+  if isinstance(value, str):
+    import dateutil.parser
+    value = dateutil.parser.parse(value)
+  return format_datetime_memo(value, format, time_locale())
+
+
+def init_app(app):
+  app.jinja_env.filters['datetime'] = format_datetime
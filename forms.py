@@ -1,19 +1,20 @@
 from datetime import datetime
 from flask_wtf import Form
 from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import DataRequired, InputRequired, AnyOf, URL
 
 class ShowForm(Form):
+    # InputRequired: the value has to be in the submitted data (bulk imports), a default does not count
     artist_id = StringField(
-        'artist_id'
+        'artist_id', validators=[InputRequired()]
     )
     venue_id = StringField(
-        'venue_id'
+        'venue_id', validators=[InputRequired()]
     )
     start_time = DateTimeField(
         'start_time',
-        validators=[DataRequired()],
-        default= datetime.today()
+        validators=[InputRequired()],
+        default= datetime.today # called for each new form, not once when forms.py is imported
     )
 
 class VenueForm(Form):
@@ -0,0 +1,17 @@
+# gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:application
+# PORT and WEB_CONCURRENCY are set by heroku, the defaults suit a local run
+
+import os
+import multiprocessing
+
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# import the app (and compile its templates) once in the master, workers share it copy-on-write
+preload_app = True
+
+
+def post_fork(server, worker):
+  # database pools and log handlers are per process, see wsgi.py
+  import wsgi
+  wsgi.post_fork()
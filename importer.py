@@ -0,0 +1,159 @@
+#----------------------------------------------------------------------------#
+# Bulk import.
+#
+# Streams venues, artists or shows out of a CSV or NDJSON file, validates
+# every row with the same WTForms form the create pages use and writes the
+# valid rows in batches (COPY on postgres, executemany elsewhere). Rows whose
+# foreign keys (a show's artist_id/venue_id) point at no row are reported by
+# line, checked with one query per foreign key and batch.
+# Each batch is its own transaction: a failing batch is rolled back and
+# reported, the rest of the file still goes in. Memory is bounded by the
+# batch size, not the file size.
+#----------------------------------------------------------------------------#
+
+import csv
+import json
+import codecs
+from werkzeug.datastructures import MultiDict
+from sqlalchemy import select
+from datagen import write_rows
+
+# rows validated and written per transaction
+BATCH_SIZE = 5000
+# validation errors kept in the report, the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# separator of multiple values (genres) inside a single csv cell
+LIST_SEPARATOR = ';'
+
+
+def read_csv(stream):
+  # yields (line number, row dict). list cells hold values separated by LIST_SEPARATOR
+  reader = csv.DictReader(codecs.getreader('utf-8')(stream))
+  for row in reader:
+    yield reader.line_num, row
+
+def read_ndjson(stream):
+  # yields (line number, row dict), one json object per line. unparsable lines come as (line number, None)
+  for line_number, line in enumerate(codecs.getreader('utf-8')(stream), start=1):
+    line = line.strip()
+    if not line:
+      continue
+    try:
+      row = json.loads(line)
+    except ValueError:
+      row = None
+    yield line_number, row if isinstance(row, dict) else None
+
+READERS = {
+  'csv': read_csv,
+  'ndjson': read_ndjson
+}
+
+def _formdata(row):
+  # turn a row into form data, lists (json arrays or separated csv cells) become repeated keys
+  formdata = MultiDict()
+  for key, value in row.items():
+    if key is None:
+      continue
+    if isinstance(value, list):
+      values = value
+    elif isinstance(value, str) and LIST_SEPARATOR in value:
+      values = [part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()]
+    else:
+      values = [value]
+    for item in values:
+      formdata.add(key, '' if item is None else str(item))
+  return formdata
+
+def _report_invalid(report, line_number, errors):
+  report['invalid'] += 1
+  if len(report['errors']) < MAX_REPORTED_ERRORS:
+    report['errors'].append({"line": line_number, "errors": errors})
+
+def _missing_references(db, table, batch):
+  # {index in batch: errors} of the rows whose foreign keys are not valid ids of existing rows.
+  # valid ones are converted to the type of the referenced column in place
+  errors = {}
+  for foreign_key in table.foreign_keys:
+    name, target = foreign_key.parent.name, foreign_key.column
+    wanted = {}
+    for index, row in enumerate(batch):
+      if row.get(name) is None:
+        continue
+      try:
+        row[name] = target.type.python_type(row[name])
+      except (ValueError, TypeError):
+        errors.setdefault(index, {})[name] = ['not a valid id']
+        continue
+      wanted.setdefault(row[name], []).append(index)
+    if not wanted:
+      continue
+    found = set(db.session.execute(select(target).where(target.in_(list(wanted)))).scalars())
+    for value, indexes in wanted.items():
+      if value not in found:
+        for index in indexes:
+          errors.setdefault(index, {})[name] = ['no {} with id {}'.format(target.table.name, value)]
+  return errors
+
+def _valid_rows(rows, form_class, table, report):
+  # validate with the same form (and so the same rules) as the create pages, yield insertable dicts
+  for line_number, row in rows:
+    report['rows'] += 1
+    if row is None:
+      errors = {"row": ['not a json object']}
+    else:
+      form = form_class(formdata=_formdata(row), meta={'csrf': False})
+      errors = None if form.validate() else form.errors
+    if errors:
+      _report_invalid(report, line_number, errors)
+      continue
+    yield line_number, {name: value for name, value in form.data.items() if name in table.c}
+
+def import_rows(db, form_class, table, rows, batch_size=BATCH_SIZE):
+  # rows is an iterable of (line number, dict), returns a report of what happened
+  report = {
+    "rows": 0,
+    "imported": 0,
+    "invalid": 0,
+    "errors": [],
+    "failed_batches": []
+  }
+
+  batch = []
+  lines = []
+
+  def flush():
+    try:
+      # a bad id fails only its own row, not the whole batch with an IntegrityError
+      missing = _missing_references(db, table, batch)
+      for index in sorted(missing):
+        _report_invalid(report, lines[index], missing[index])
+      rows = [row for index, row in enumerate(batch) if index not in missing]
+      if rows:
+        write_rows(db, table, rows)
+      db.session.commit()
+      report['imported'] += len(rows)
+    except Exception as error:
+      db.session.rollback()
+      report['failed_batches'].append({
+        "first_line": lines[0],
+        "last_line": lines[-1],
+        "rows": len(batch),
+        "error": str(error).split('\n')[0]
+      })
+
+  for line_number, values in _valid_rows(rows, form_class, table, report):
+    batch.append(values)
+    lines.append(line_number)
+    if len(batch) == batch_size:
+      flush()
+      batch = []
+      lines = []
+  if batch:
+    flush()
+
+  return report
+
+def import_stream(db, form_class, table, stream, fmt, batch_size=BATCH_SIZE):
+  # import a binary stream in the given format ('csv' or 'ndjson')
+  return import_rows(db, form_class, table, READERS[fmt](stream), batch_size)
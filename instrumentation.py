@@ -0,0 +1,81 @@
+#----------------------------------------------------------------------------#
+# Per-request SQL instrumentation.
+#
+# Hooks into SQLAlchemy engine events to count the queries each request issues
+# and time them, reports the numbers in a Server-Timing response header and
+# logs requests that go over the configured thresholds.
+#----------------------------------------------------------------------------#
+
+import time
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  # kept on the statement's execution context, not the connection: a statement that fails
+  # never gets its after_cursor_execute and leaves nothing behind on the pooled connection
+  if context is not None:
+    context._query_start_time = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  start = getattr(context, '_query_start_time', None)
+  if start is None:
+    return
+  elapsed = time.perf_counter() - start
+
+  # statements run outside a request (cli, shell) are not tracked
+  if not has_request_context():
+    return
+  stats = g.get('sql_stats')
+  if stats is None:
+    return
+
+  stats['count'] += 1
+  stats['time'] += elapsed
+  if elapsed > stats['slowest_time']:
+    stats['slowest_time'] = elapsed
+    stats['slowest_statement'] = statement
+
+def _start_request():
+  g.sql_stats = {
+    "count": 0,
+    "time": 0.0,
+    "slowest_time": 0.0,
+    "slowest_statement": None
+  }
+  g.request_start_time = time.perf_counter()
+
+def _finish_request(response):
+  stats = g.get('sql_stats')
+  if stats is None:
+    return response
+
+  total_ms = (time.perf_counter() - g.request_start_time) * 1000
+  db_ms = stats['time'] * 1000
+
+  # see: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+  response.headers.add('Server-Timing', 'db;dur={:.2f};desc="{} queries"'.format(db_ms, stats['count']))
+  response.headers.add('Server-Timing', 'db-slowest;dur={:.2f}'.format(stats['slowest_time'] * 1000))
+  response.headers.add('Server-Timing', 'total;dur={:.2f}'.format(total_ms))
+
+  if stats['count'] > current_app.config['SLOW_REQUEST_QUERY_COUNT'] or db_ms > current_app.config['SLOW_REQUEST_DB_MS']:
+    current_app.logger.warning(
+      'slow request %s %s: %d queries, %.2fms in db, %.2fms total, slowest query %.2fms: %s',
+      request.method, request.full_path, stats['count'], db_ms, total_ms,
+      stats['slowest_time'] * 1000, ' '.join((stats['slowest_statement'] or '').split()))
+
+  return response
+
+
+def init_app(app):
+  app.config.setdefault('SLOW_REQUEST_QUERY_COUNT', 20)
+  app.config.setdefault('SLOW_REQUEST_DB_MS', 200)
+
+  # listening on the Engine class covers every engine the app creates
+  if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+  app.before_request(_start_request)
+  app.after_request(_finish_request)
@@ -0,0 +1,188 @@
+#----------------------------------------------------------------------------#
+# Background jobs.
+#
+# A small job runner whose queue is a table of the app's own database, so it
+# needs no broker: postgres in production, a sqlite file locally. Jobs are
+# queued with enqueue() and run by `flask worker` (or by a thread of the web
+# process when JOBS_IN_PROCESS is set) on a pool of threads.
+#
+# Periodic tasks have one row each (key = task name) that goes back to the
+# queue after every run. Jobs are claimed with a conditional UPDATE, so any
+# number of threads and worker processes can share the queue and a job never
+# runs twice at the same time.
+#----------------------------------------------------------------------------#
+
+import json
+import threading
+import traceback
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import IntegrityError
+
+# seconds before the first retry of a failed job, doubled on every further attempt
+RETRY_DELAY = 30
+
+# task name -> function, filled by @task
+TASKS = {}
+
+
+def task(name):
+  # register a function as a task, jobs call it with their kwargs inside an app context
+  def register(function):
+    TASKS[name] = function
+    return function
+  return register
+
+def enqueue(db, Job, name, run_at=None, **kwargs):
+  # queue a one-off job, commits the session. returns the job id
+  if name not in TASKS:
+    raise KeyError('unknown task {!r}'.format(name))
+  job = Job(name=name, kwargs=json.dumps(kwargs), run_at=run_at or datetime.now())
+  db.session.add(job)
+  db.session.commit()
+  return job.id
+
+def purge(db, Job, before):
+  # delete finished one-off jobs (done or failed) that ended before <before>, returns how many
+  deleted = Job.query \
+    .filter(Job.key.is_(None), Job.status.in_(['done', 'failed']), Job.finished_at < before) \
+    .delete(synchronize_session=False)
+  db.session.commit()
+  return deleted
+
+
+class Worker(object):
+
+  def __init__(self, app, db, Job, threads=2, poll_interval=1.0, schedule=None, max_attempts=3, timeout=600):
+    self.app = app
+    self.db = db
+    self.Job = Job
+    self.threads = threads
+    self.poll_interval = poll_interval
+    # periodic task name -> seconds between runs
+    self.schedule = dict(schedule or {})
+    self.max_attempts = max_attempts
+    # a job running longer than this is taken for the job of a dead worker and queued again
+    self.timeout = timeout
+    self._stop = threading.Event()
+    self._free = threading.Semaphore(threads)
+
+  def install_schedule(self):
+    # one row per periodic task. a worker starting at the same time may insert it first
+    Job = self.Job
+    # periodic tasks taken off the schedule (e.g. warm-page-cache without redis) stop coming back
+    Job.query.filter(Job.key.isnot(None), Job.key.notin_(list(self.schedule)), Job.status != 'running') \
+      .delete(synchronize_session=False)
+    for name, every in self.schedule.items():
+      if Job.query.filter_by(key=name).update({'every': every}, synchronize_session=False):
+        self.db.session.commit()
+        continue
+      try:
+        self.db.session.add(Job(name=name, key=name, every=every, kwargs='{}', run_at=datetime.now()))
+        self.db.session.commit()
+      except IntegrityError:
+        self.db.session.rollback()
+
+  def requeue_stale(self, now):
+    Job = self.Job
+    Job.query \
+      .filter(Job.status == 'running', Job.started_at < now - timedelta(seconds=self.timeout)) \
+      .update({'status': 'queued', 'run_at': now}, synchronize_session=False)
+    self.db.session.commit()
+
+  def claim(self, now):
+    # id of a due job now marked running by us, None when nothing is due
+    Job = self.Job
+    due = Job.query.with_entities(Job.id) \
+      .filter(Job.status == 'queued', Job.run_at <= now) \
+      .order_by(Job.run_at, Job.id) \
+      .limit(self.threads + 1) \
+      .all()
+    for job_id, in due:
+      # another thread or worker may have taken it since the select
+      claimed = Job.query \
+        .filter(Job.id == job_id, Job.status == 'queued') \
+        .update({'status': 'running', 'started_at': now, 'attempts': Job.attempts + 1}, synchronize_session=False)
+      self.db.session.commit()
+      if claimed:
+        return job_id
+    return None
+
+  def run_job(self, job_id):
+    with self.app.app_context():
+      job = self.Job.query.get(job_id)
+      error = None
+      try:
+        TASKS[job.name](**json.loads(job.kwargs))
+      except Exception:
+        error = traceback.format_exc()
+        self.app.logger.error('job %s (%s) failed\n%s', job_id, job.name, error)
+        self.db.session.rollback()
+      self.finish(self.Job.query.get(job_id), error)
+
+  def finish(self, job, error):
+    now = datetime.now()
+    job.finished_at = now
+    job.last_error = error
+    if job.every is not None:
+      # periodic: back in the queue for the next run, whether this one failed or not
+      job.status = 'queued'
+      job.run_at = now + timedelta(seconds=job.every)
+      job.attempts = 0
+    elif error is None:
+      job.status = 'done'
+    elif job.attempts < self.max_attempts:
+      job.status = 'queued'
+      job.run_at = now + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+    else:
+      job.status = 'failed'
+    self.db.session.commit()
+
+  def run_due(self):
+    # run every job that is due right here, one after the other. returns how many ran
+    ran = 0
+    with self.app.app_context():
+      self.install_schedule()
+      while True:
+        job_id = self.claim(datetime.now())
+        if job_id is None:
+          return ran
+        self.run_job(job_id)
+        ran += 1
+
+  def _run_and_free(self, job_id):
+    try:
+      self.run_job(job_id)
+    finally:
+      self._free.release()
+
+  def run(self):
+    # poll the queue until stop(), handing due jobs to the thread pool as threads free up
+    with self.app.app_context():
+      self.install_schedule()
+    with ThreadPoolExecutor(self.threads, thread_name_prefix='fyyur-job') as pool:
+      while not self._stop.is_set():
+        try:
+          with self.app.app_context():
+            now = datetime.now()
+            self.requeue_stale(now)
+            while self._free.acquire(blocking=False):
+              job_id = self.claim(now)
+              if job_id is None:
+                self._free.release()
+                break
+              pool.submit(self._run_and_free, job_id)
+        except Exception:
+          # a lost database connection should not end the worker, try again on the next poll
+          self.app.logger.exception('job queue poll failed')
+        self._stop.wait(self.poll_interval)
+
+  def start(self):
+    # run() on a daemon thread of the current process
+    thread = threading.Thread(target=self.run, name='fyyur-jobs', daemon=True)
+    thread.start()
+    return thread
+
+  def stop(self):
+    # jobs already running are finished first
+    self._stop.set()
@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------#
+# In-process metrics.
+#
+# A tiny metrics registry exposed at /metrics in the Prometheus text format:
+# request counts by status, per-endpoint latency histograms, template render
+# time, database pool activity (checkouts, wait time, connections in use and
+# overflow) and page cache hits.
+#
+# The hot path never takes a lock: every thread updates its own shard of each
+# metric and shards are only summed up when /metrics is scraped.
+#----------------------------------------------------------------------------#
+
+import time
+import weakref
+import threading
+from bisect import bisect_left
+from flask import Response, g, request, signals_available, template_rendered, before_render_template
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric(object):
+  kind = None
+
+  def __init__(self, name, description, labels=()):
+    self.name = name
+    self.description = description
+    self.labels = tuple(labels)
+    self._local = threading.local()
+    # (weakref to the thread, values) for every live thread that touched this metric
+    self._shards = []
+    # values left behind by threads that are gone
+    self._retired = {}
+    self._shards_lock = threading.Lock()
+
+  def _values(self):
+    # values of the current thread, the lock is only taken the first time a thread shows up.
+    # finished threads are folded in here too, a thread per request server would otherwise
+    # pile up shards until the next scrape
+    try:
+      return self._local.values
+    except AttributeError:
+      values = self._local.values = {}
+      with self._shards_lock:
+        self._fold_finished()
+        self._shards.append((weakref.ref(threading.current_thread()), values))
+      return values
+
+  def _fold_finished(self):
+    # move the values of finished threads into _retired, with _shards_lock held
+    alive = []
+    for thread_ref, values in self._shards:
+      thread = thread_ref()
+      if thread is not None and thread.is_alive():
+        alive.append((thread_ref, values))
+      else:
+        self._merge(self._retired, values)
+    self._shards = alive
+
+  def _collect(self):
+    # sum up the shards of all threads and of the finished ones
+    with self._shards_lock:
+      self._fold_finished()
+      total = {}
+      self._merge(total, self._retired)
+      for thread_ref, values in self._shards:
+        self._merge(total, dict(values))
+    return total
+
+  def _format_labels(self, label_values, extra=()):
+    pairs = list(zip(self.labels, label_values)) + list(extra)
+    if not pairs:
+      return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+  def expose(self):
+    lines = ['# HELP {} {}'.format(self.name, self.description), '# TYPE {} {}'.format(self.name, self.kind)]
+    lines.extend(self._samples())
+    return lines
+
+
+class Counter(Metric):
+  kind = 'counter'
+
+  def inc(self, *label_values, amount=1):
+    values = self._values()
+    values[label_values] = values.get(label_values, 0) + amount
+
+  def _merge(self, into, values):
+    for key, value in values.items():
+      into[key] = into.get(key, 0) + value
+
+  def _samples(self):
+    for label_values, value in sorted(self._collect().items()):
+      yield '{}{} {}'.format(self.name, self._format_labels(label_values), value)
+
+
+class Histogram(Metric):
+  kind = 'histogram'
+
+  def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+    super(Histogram, self).__init__(name, description, labels)
+    self.buckets = tuple(buckets)
+
+  def observe(self, value, *label_values):
+    values = self._values()
+    series = values.get(label_values)
+    if series is None:
+      # one slot per bucket plus +Inf, then sum
+      series = values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+    series[bisect_left(self.buckets, value)] += 1
+    series[-1] += value
+
+  def _merge(self, into, values):
+    for key, series in values.items():
+      if key not in into:
+        into[key] = list(series)
+      else:
+        into[key] = [a + b for a, b in zip(into[key], series)]
+
+  def _samples(self):
+    for label_values, series in sorted(self._collect().items()):
+      cumulative = 0
+      for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+        cumulative += count
+        yield '{}_bucket{} {}'.format(self.name, self._format_labels(label_values, [('le', bound)]), cumulative)
+      yield '{}_sum{} {}'.format(self.name, self._format_labels(label_values), series[-1])
+      yield '{}_count{} {}'.format(self.name, self._format_labels(label_values), cumulative)
+
+
+class Gauge(Metric):
+  # current values, read from <collect>() ({label values: value}) when /metrics is scraped
+  kind = 'gauge'
+
+  def __init__(self, name, description, labels, collect):
+    super(Gauge, self).__init__(name, description, labels)
+    self.collect = collect
+
+  def _samples(self):
+    for label_values, value in sorted(self.collect().items()):
+      yield '{}{} {}'.format(self.name, self._format_labels(label_values), value)
+
+
+def _escape(value):
+  return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+REQUESTS = Counter('fyyur_requests_total', 'HTTP requests by endpoint, method and status.', ('endpoint', 'method', 'status'))
+REQUEST_DURATION = Histogram('fyyur_request_duration_seconds', 'Request latency by endpoint.', ('endpoint',))
+TEMPLATE_RENDER = Histogram('fyyur_template_render_seconds', 'Jinja template render time by template.', ('template',))
+POOL_CHECKOUT_WAIT = Histogram('fyyur_db_pool_checkout_wait_seconds', 'Time spent waiting for a connection from the pool.', ('pool',))
+POOL_EVENTS = Counter('fyyur_db_pool_events_total', 'Pool events (connect, checkout, checkin, invalidate, timeout) by pool.', ('pool', 'event'))
+PAGE_CACHE = Counter('fyyur_page_cache_total', 'Page cache lookups by page and result (hit or miss).', ('page', 'result'))
+
+# pools created in this process, see TimedQueuePool
+_pools = weakref.WeakSet()
+
+def _pool_connections():
+  # size is the configured pool_size, overflow the connections opened on top of it
+  values = {}
+  for pool in list(_pools):
+    name = pool.metrics_name
+    for state, value in (('size', pool.size()), ('checked_out', pool.checkedout()),
+                         ('idle', pool.checkedin()), ('overflow', max(0, pool.overflow()))):
+      values[(name, state)] = values.get((name, state), 0) + value
+  return values
+
+POOL_CONNECTIONS = Gauge('fyyur_db_pool_connections', 'Connections of each pool by state (size, checked_out, idle, overflow).', ('pool', 'state'), _pool_connections)
+
+REGISTRY = [REQUESTS, REQUEST_DURATION, TEMPLATE_RENDER, POOL_CHECKOUT_WAIT, POOL_EVENTS, POOL_CONNECTIONS, PAGE_CACHE]
+
+
+def _count_pool_event(name, pool_event):
+  def count(*args):
+    POOL_EVENTS.inc(name, pool_event)
+  return count
+
+class TimedQueuePool(QueuePool):
+  # QueuePool that reports its events, its state and how long each checkout waited for a connection.
+  # the pool is named by the engine's pool_logging_name
+
+  def __init__(self, *args, **kwargs):
+    super(TimedQueuePool, self).__init__(*args, **kwargs)
+    self.metrics_name = self.logging_name or 'default'
+    _pools.add(self)
+    # a pool recreated by dispose() takes over the listeners of the old one
+    if kwargs.get('_dispatch') is None:
+      for pool_event in ('connect', 'checkout', 'checkin', 'invalidate'):
+        event.listen(self, pool_event, _count_pool_event(self.metrics_name, pool_event))
+
+  def _do_get(self):
+    start = time.perf_counter()
+    try:
+      return super(TimedQueuePool, self)._do_get()
+    except exc.TimeoutError:
+      POOL_EVENTS.inc(self.metrics_name, 'timeout')
+      raise
+    finally:
+      POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, self.metrics_name)
+
+
+#----------------------------------------------------------------------------#
+# Flask hooks.
+#----------------------------------------------------------------------------#
+
+def _start_request():
+  g.metrics_start_time = time.perf_counter()
+
+def _finish_request(response):
+  start = g.get('metrics_start_time')
+  if start is not None:
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_DURATION.observe(time.perf_counter() - start, endpoint)
+    REQUESTS.inc(endpoint, request.method, response.status_code)
+  return response
+
+def _before_render(sender, template, context, **extra):
+  # templates can render other templates (includes are compiled in, but render_template can nest)
+  g.setdefault('template_start_times', []).append(time.perf_counter())
+
+def _after_render(sender, template, context, **extra):
+  start_times = g.get('template_start_times')
+  if start_times:
+    TEMPLATE_RENDER.observe(time.perf_counter() - start_times.pop(), template.name or 'string')
+
+def metrics():
+  lines = []
+  for metric in REGISTRY:
+    lines.extend(metric.expose())
+  return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+  # pool metrics come from TimedQueuePool, installed by pooling.engine_options
+  app.before_request(_start_request)
+  app.after_request(_finish_request)
+
+  # flask only sends template signals when blinker is installed
+  if signals_available:
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+  app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,29 @@
+"""add trigram indexes on venue and artist names
+
+Revision ID: 45883016f130
+Revises: a3bf29b32369
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '45883016f130'
+down_revision = 'a3bf29b32369'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm lets a GIN index serve the leading-wildcard ILIKE used by the search pages
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_venue_name_trgm', 'venue', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_artist_name_trgm', 'artist', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_trgm', table_name='artist')
+    op.drop_index('ix_venue_name_trgm', table_name='venue')
+    # the extension is left installed, other database objects may rely on it
@@ -0,0 +1,29 @@
+"""add updated_at to venue, artist and show
+
+Revision ID: 4fed3240ef00
+Revises: 5fcad20cbcdc
+Create Date: 2026-10-18 11:02:19.204417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4fed3240ef00'
+down_revision = '5fcad20cbcdc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # existing rows (and rows written by COPY) get the time of the migration through the server default
+    op.add_column('venue', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.add_column('artist', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.add_column('show', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade():
+    op.drop_column('show', 'updated_at')
+    op.drop_column('artist', 'updated_at')
+    op.drop_column('venue', 'updated_at')
@@ -0,0 +1,133 @@
+#----------------------------------------------------------------------------#
+# Models.
+#
+# db is bound to the app by create_app() in app.py (db.init_app), so the
+# models can be imported without building an app.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from sqlalchemy import func, event, DDL
+from sqlalchemy.orm import configure_mappers
+import replicas
+
+# SQLAlchemy with a session that can send reads to replicas, see replicas.py
+db = replicas.RoutingSQLAlchemy()
+# the trigram indexes below need pg_trgm. migrations create it, this covers db.create_all()
+# on a fresh postgres database (flask generate-data --reset, the benchmarks)
+event.listen(db.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+class Venue(db.Model):
+    __tablename__ = 'venue'   #changed table name from 'Venue' => 'venue' for easy to use in database conn.
+    # trigram index backing the partial, case-insensitive name search
+    __table_args__ = (
+      db.Index('ix_venue_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+    # given default values at last to let some forms works -> post-venue, post-artists
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500), default="")
+    facebook_link = db.Column(db.String(120))
+    # TODO-DONE: implement any missing fields, as a database migration using Flask-Migrate
+    genres = db.Column(db.ARRAY(db.String()).with_variant(db.JSON(), 'sqlite')) # sqlite has no arrays, used by local benchmarks
+    website = db.Column(db.String(120), default="")
+    seeking_talent = db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String(500), default="") # assumed len of description mot more than 500
+    # bumped on every change, used for the ETag/Last-Modified of the detail pages
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, server_default=func.now())
+    # upcoming/past show counters, exact as of ShowCounterState.counted_at (see counters.py)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    shows = db.relationship('Show', backref="venue", lazy=True)
+
+    def __repr__(self):
+      return '<Venue {}>'.format(self.name)
+
+class Artist(db.Model):
+    __tablename__ = 'artist'  # #changed table name from 'Artist' => 'artist' for easy to use in database conn.
+    # trigram index backing the partial, case-insensitive name search
+    __table_args__ = (
+      db.Index('ix_artist_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    genres = db.Column(db.ARRAY(db.String()).with_variant(db.JSON(), 'sqlite')) #changed genres to array of strings
+    image_link = db.Column(db.String(500), default="")
+    facebook_link = db.Column(db.String(120))
+    # TODO-DONE: implement any missing fields, as a database migration using Flask-Migrate
+    website = db.Column(db.String(120), default="")
+    seeking_venue =  db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String(500), default="")
+    # bumped on every change, used for the ETag/Last-Modified of the detail pages
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, server_default=func.now())
+    # upcoming/past show counters, exact as of ShowCounterState.counted_at (see counters.py)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    shows = db.relationship('Show', backref="artist", lazy=True)
+
+    def __repr__(self):
+      return '<Artist {}>'.format(self.name)
+
+# TODO-DONE: Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+class Show(db.Model):
+    __tablename__ = 'show'
+    # detail pages and counts filter by venue/artist plus a start_time range, /shows orders by start_time
+    __table_args__ = (
+      db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+      db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+      db.Index('ix_show_start_time', 'start_time'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    # bumped on every change, used for the ETag/Last-Modified of the detail pages
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, server_default=func.now())
+
+    def __repr__(self):
+          return '<Show {}{}>'.format(self.artist_id, self.venue_id)
+
+class ShowCounterState(db.Model):
+    __tablename__ = 'show_counter_state'
+    # a single row: shows starting after counted_at are counted as upcoming, the others as past
+    id = db.Column(db.Integer, primary_key=True)
+    counted_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+      return '<ShowCounterState {}>'.format(self.counted_at)
+
+class Job(db.Model):
+    __tablename__ = 'job'
+    # the queue of jobs.py: workers pick queued rows whose run_at has come
+    __table_args__ = (
+      db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    # json object of keyword arguments for the task
+    kwargs = db.Column(db.Text, nullable=False, default='{}')
+    # queued -> running -> done | failed (or queued again for a retry)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    # periodic tasks: key is the task name (one row per task) and every the seconds between runs
+    key = db.Column(db.String(120), unique=True)
+    every = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+      return '<Job {} {} {}>'.format(self.id, self.name, self.status)
+
+# set up the backrefs (Show.venue, Show.artist) now: the select()s of queries.py use them
+# before any query would have configured the mappers
+configure_mappers()
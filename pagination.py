@@ -0,0 +1,94 @@
+#----------------------------------------------------------------------------#
+# Pagination.
+#----------------------------------------------------------------------------#
+
+import json
+import base64
+from datetime import datetime
+from flask import request
+from sqlalchemy import DateTime, tuple_
+from config import PAGE_SIZE, MAX_PAGE_SIZE
+from models import db
+
+def encode_cursor(values):
+  # opaque, url-safe token for a keyset position. datetimes travel as iso strings
+  payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+  return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def parse_datetime(value):
+  # dateutil is only loaded once a cursor holding a datetime comes in
+  import dateutil.parser
+  return dateutil.parser.parse(value)
+
+def cursor_value(key, value):
+  # value of key out of a decoded cursor, ValueError unless it has the type of the key's column
+  if value is None and key.nullable:
+    return None
+  if isinstance(key.type, DateTime):
+    if not isinstance(value, str):
+      raise ValueError('not a datetime string')
+    return parse_datetime(value)
+  # json true/false would pass as ints
+  if isinstance(value, bool) or not isinstance(value, key.type.python_type):
+    raise ValueError('not a {}'.format(key.type.python_type.__name__))
+  return value
+
+def decode_cursor(token, keys):
+  # turns a token back into values for keys, None if the token is malformed or crafted
+  try:
+    values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if not isinstance(values, list) or len(values) != len(keys):
+      return None
+    return [cursor_value(key, value) for key, value in zip(keys, values)]
+  except (ValueError, TypeError, OverflowError):
+    return None
+
+def page_args(keys):
+  # read ?after=<cursor> / ?before=<cursor> / ?limit=<n> of the current request
+  limit = request.args.get('limit', PAGE_SIZE, type=int)
+  limit = max(1, min(limit, MAX_PAGE_SIZE))
+  after = request.args.get('after')
+  before = request.args.get('before')
+  return {
+    "limit": limit,
+    "after": decode_cursor(after, keys) if after else None,
+    "before": decode_cursor(before, keys) if before else None
+  }
+
+def keyset_page(statement, keys, position, limit, after=None, before=None, scalars=False):
+  # keyset (cursor) pagination: instead of OFFSET, filter on the sort key of the last row seen,
+  # so every page is an index range scan no matter how deep it is.
+  # statement is a lambda_stmt() select, keys are its (unique) sort columns, position(row) returns
+  # the values of keys for a row. scalars: the statement selects one entity, return those instead of rows.
+  # returns (rows, page) where page holds the cursors for the next/previous links
+  # conditions and orderings are built out here, the lambdas only pick them up (see queries.py)
+  if before:
+    # walk backwards from the cursor and flip the rows back afterwards
+    condition = tuple_(*keys) < tuple_(*before)
+    order = [key.desc() for key in keys]
+    statement += lambda s: s.where(condition).order_by(*order)
+  else:
+    if after:
+      condition = tuple_(*keys) > tuple_(*after)
+      statement += lambda s: s.where(condition)
+    statement += lambda s: s.order_by(*keys)
+
+  # one extra row tells if there is another page in the direction we are walking
+  fetch = limit + 1
+  statement += lambda s: s.limit(fetch)
+  result = db.session.execute(statement)
+  rows = (result.scalars() if scalars else result).all()
+  has_more = len(rows) > limit
+  rows = rows[:limit]
+  if before:
+    rows.reverse()
+
+  has_next = has_more if not before else True
+  has_prev = has_more if before else after is not None
+
+  page = {
+    "limit": limit,
+    "next": encode_cursor(position(rows[-1])) if rows and has_next else None,
+    "prev": encode_cursor(position(rows[0])) if rows and has_prev else None
+  }
+  return rows, page
@@ -0,0 +1,44 @@
+#----------------------------------------------------------------------------#
+# Connection pool settings.
+#
+# Turns the DB_* settings of config.py into SQLAlchemy engine options for the
+# primary and the read replicas: the pool and the size of the compiled cache.
+# Pools are TimedQueuePools (metrics.py), so checkouts, wait time and overflow
+# usage show up at /metrics per pool.
+#
+# Sizing: every worker process has its own pool, so the database sees up to
+# processes * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per engine.
+#----------------------------------------------------------------------------#
+
+from sqlalchemy.engine.url import make_url
+from metrics import TimedQueuePool
+
+
+def engine_options(url, config, name='primary'):
+  # SQLALCHEMY_ENGINE_OPTIONS for the database at <url>, <name> labels its pool in the metrics
+  options = {
+    # compiled statements, reused by the lambda_stmt() queries of queries.py
+    'query_cache_size': config['DB_QUERY_CACHE_SIZE']
+  }
+  if url.startswith('sqlite'):
+    # sqlite (local benchmarks) keeps the pool SQLAlchemy picks for it
+    return options
+
+  options.update({
+    'poolclass': TimedQueuePool,
+    'pool_logging_name': name,
+    'pool_size': config['DB_POOL_SIZE'],
+    'max_overflow': config['DB_MAX_OVERFLOW'],
+    'pool_timeout': config['DB_POOL_TIMEOUT'],
+    'pool_recycle': config['DB_POOL_RECYCLE'],
+    'pool_pre_ping': config['DB_POOL_PRE_PING']
+  })
+
+  if config['DB_PGBOUNCER']:
+    # PgBouncer in transaction pooling mode hands each transaction to any server connection,
+    # so nothing may be prepared on one connection and used later on another.
+    # psycopg2 never prepares statements server side, psycopg 3 does after prepare_threshold executions
+    if make_url(url).get_driver_name() == 'psycopg':
+      options['connect_args'] = {'prepare_threshold': None}
+
+  return options
@@ -0,0 +1,290 @@
+#----------------------------------------------------------------------------#
+# Queries.
+#
+# The statements of the hot paths (detail pages, search, listings) are
+# 2.0-style select()s wrapped in lambda_stmt(). A lambda runs once per call
+# site to build its statement; after that SQLAlchemy only reads the new bound
+# values (ids, now, search terms) out of the closure and finds the compiled SQL
+# in the engine's compiled cache (DB_QUERY_CACHE_SIZE), where a Query was built
+# and its cache key generated again on every request.
+# Values that change the shape of a statement, like the cursor conditions of
+# keyset_page, are built outside the lambdas. see benchmarks/query_overhead.py
+#----------------------------------------------------------------------------#
+
+from hashlib import sha1
+from datetime import timezone
+from itertools import groupby
+from sqlalchemy import select, lambda_stmt, func
+from sqlalchemy.orm import load_only, contains_eager
+from config import SEARCH_MODE, SEARCH_RESULT_LIMIT
+from models import db, Venue, Artist, Show
+from pagination import keyset_page
+
+# sort keys of the paginated listings
+VENUE_PAGE_KEYS = (Venue.state, Venue.city, Venue.id)
+ARTIST_PAGE_KEYS = (Artist.id,)
+SHOW_PAGE_KEYS = (Show.start_time, Show.id)
+
+def venue_areas(limit, after=None, before=None):
+  # fetch a page of venues together with their number of upcoming shows in a single statement,
+  # the counts are the materialized counter columns
+  statement = lambda_stmt(lambda: select(
+      Venue.id,
+      Venue.name,
+      Venue.city,
+      Venue.state,
+      Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ))
+
+  rows, page = keyset_page(statement, VENUE_PAGE_KEYS, lambda row: (row.state, row.city, row.id), limit, after, before)
+
+  # rows are sorted by area, so consecutive rows with the same city/state make up one area
+  areas = []
+  for (city, state), area_rows in groupby(rows, key=lambda row: (row.city, row.state)):
+    areas.append({
+      "city": city,
+      "state": state,
+      "venues": [{
+        "id": row.id,
+        "name": row.name,
+        "num_upcoming_shows": row.num_upcoming_shows
+        } for row in area_rows]
+      })
+
+  return areas, page
+
+def search_by_name(model, search_term):
+  # partial, case-insensitive search on model.name (Venue or Artist), capped at SEARCH_RESULT_LIMIT rows.
+  # @see : https://stackoverflow.com/questions/20363836/postgresql-ilike-query-with-sqlalchemy
+  # the result pages only show id, name and number of upcoming shows, so only those columns are selected
+  pattern = f'%{search_term}%'
+  # one lambda per ordering, cheaper than adding the ordering to the statement as a second lambda
+  if SEARCH_MODE == 'trigram' and db.engine.dialect.name == 'postgresql':
+    # the ILIKE is served by the pg_trgm GIN index, best matches come first
+    statement = lambda_stmt(lambda: select(model.id, model.name, model.upcoming_shows_count)
+      .where(model.name.ilike(pattern))
+      .order_by(func.similarity(model.name, search_term).desc(), model.id)
+      .limit(SEARCH_RESULT_LIMIT))
+  else:
+    statement = lambda_stmt(lambda: select(model.id, model.name, model.upcoming_shows_count)
+      .where(model.name.ilike(pattern))
+      .order_by(model.name, model.id)
+      .limit(SEARCH_RESULT_LIMIT))
+
+  return db.session.execute(statement).all()
+
+def artist_list_page(limit, after=None, before=None):
+  # /artists only renders id and name, select just those instead of whole Artist rows
+  statement = lambda_stmt(lambda: select(Artist.id, Artist.name))
+  return keyset_page(statement, ARTIST_PAGE_KEYS, lambda row: (row.id,), limit, after, before)
+
+def venue_shows(venue_id):
+  # shows of a venue in start_time order, loading only the show and artist columns the venue page renders.
+  # contains_eager fills show.artist from the JOIN, so reading it does not fire another SELECT
+  statement = lambda_stmt(lambda: select(Show)
+    .join(Artist)
+    .where(Show.venue_id == venue_id)
+    .options(
+      load_only(Show.id, Show.artist_id, Show.start_time),
+      contains_eager(Show.artist).load_only(Artist.id, Artist.name, Artist.image_link))
+    .order_by(Show.start_time))
+  return db.session.execute(statement).scalars().all()
+
+def artist_shows(artist_id):
+  # shows of an artist in start_time order, loading only the show and venue columns the artist page renders.
+  # contains_eager fills show.venue from the JOIN, so reading it does not fire another SELECT
+  statement = lambda_stmt(lambda: select(Show)
+    .join(Venue)
+    .where(Show.artist_id == artist_id)
+    .options(
+      load_only(Show.id, Show.venue_id, Show.start_time),
+      contains_eager(Show.venue).load_only(Venue.id, Venue.name, Venue.image_link))
+    .order_by(Show.start_time))
+  return db.session.execute(statement).scalars().all()
+
+def page_validator(entity, other, show_column, other_column, entity_id, now, representation):
+  # (etag, last_modified) of a venue/artist page from one aggregate query, None if the entity does not exist.
+  # the page changes when the entity, one of its shows or one of the other side's rows (artist names on a venue page)
+  # is updated, when a show is added/removed, and when an upcoming show becomes a past one at its start_time
+  statement = lambda_stmt(lambda: select(
+      entity.updated_at,
+      func.max(Show.updated_at),
+      func.max(other.updated_at),
+      func.count(Show.id),
+      func.max(Show.start_time).filter(Show.start_time <= now)
+    ).outerjoin(Show, show_column == entity.id)
+    .outerjoin(other, other.id == other_column)
+    .where(entity.id == entity_id)
+    .group_by(entity.id))
+  row = db.session.execute(statement).first()
+  if row is None:
+    return None
+
+  # the show count only goes into the etag: deleting a show changes the page without bumping any updated_at
+  last_modified = max(value for value in (row[0], row[1], row[2], row[4]) if value is not None)
+  # html page and json document of the same venue get different etags
+  etag = sha1('{}:{}:{}:{}'.format(representation, entity.__tablename__, entity_id, '|'.join(str(value) for value in row)).encode()).hexdigest()
+  # timestamps are stored in server local time, http dates are utc and have no sub-second part
+  last_modified = last_modified.replace(microsecond=0).astimezone(timezone.utc).replace(tzinfo=None)
+  return etag, last_modified
+
+def venue_validator(venue_id, now, representation='html'):
+  return page_validator(Venue, Artist, Show.venue_id, Show.artist_id, venue_id, now, representation)
+
+def artist_validator(artist_id, now, representation='html'):
+  return page_validator(Artist, Venue, Show.artist_id, Show.venue_id, artist_id, now, representation)
+
+def partition_shows(shows, now):
+  # split shows (ordered by start_time) into (upcoming, past) around one timestamp,
+  # so a show starting exactly at <now> can not fall between the two lists
+  upcoming_shows = []
+  past_shows = []
+  for show in shows:
+    if show.start_time > now:
+      upcoming_shows.append(show)
+    else:
+      past_shows.append(show)
+  return upcoming_shows, past_shows
+
+def shows_statement():
+  # all shows, loading only the columns /shows renders.
+  # contains_eager fills show.artist and show.venue from the JOINs, so reading them does not fire another SELECT
+  return lambda_stmt(lambda: select(Show)
+    .join(Artist)
+    .join(Venue)
+    .options(
+      load_only(Show.id, Show.artist_id, Show.venue_id, Show.start_time),
+      contains_eager(Show.artist).load_only(Artist.id, Artist.name, Artist.image_link),
+      contains_eager(Show.venue).load_only(Venue.id, Venue.name)))
+
+#----------------------------------------------------------------------------#
+# Page data.
+# plain dicts/lists assembled from the queries above, shared by the html views and the json api
+#----------------------------------------------------------------------------#
+
+def venue_details(venue_id, now):
+  # everything the venue page (and the api) shows about a venue, None if there is no such venue
+  # get venue with <venue_id> from database 
+  venue = db.session.get(Venue, venue_id)
+
+  # if we did not get any venue corresponding to <venue_id>
+  if not venue:
+    return None
+
+  # if we got venue
+  # then populate details of upcoming_shows[] and past_shows[]
+  # query -> get all shows with corresponding artists details in one go, then split them into upcoming/past
+  query_on_upcoming, query_on_past = partition_shows(venue_shows(venue_id), now)
+
+  upcoming_shows_with_artists_details = []
+  past_shows_with_artists_details = []
+
+
+  for curr_show in query_on_upcoming:
+    upcoming_shows_with_artists_details.append({
+      "artist_id": curr_show.artist_id,
+      "artist_name": curr_show.artist.name,
+      "artist_image_link": curr_show.artist.image_link,
+      "start_time": curr_show.start_time
+      })
+
+  for curr_show in query_on_past:
+    past_shows_with_artists_details.append({
+      "artist_id": curr_show.artist_id,
+      "artist_name": curr_show.artist.name,
+      "artist_image_link": curr_show.artist.image_link,
+      "start_time": curr_show.start_time
+      })
+
+  # populate data[] to be sent to the view/api
+  data = {
+    "id": venue.id,
+    "name": venue.name,
+    "genres": venue.genres,
+    "address": venue.address,
+    "city": venue.city,
+    "state": venue.state,
+    "phone": venue.phone,
+    "website": venue.website,
+    "facebook_link": venue.facebook_link,
+    "seeking_talent": venue.seeking_talent,
+    "seeking_description": venue.seeking_description,
+    "image_link": venue.image_link,
+    "past_shows": past_shows_with_artists_details,
+    "upcoming_shows": upcoming_shows_with_artists_details,
+    "past_shows_count": len(past_shows_with_artists_details),
+    "upcoming_shows_count": len(upcoming_shows_with_artists_details)
+  }
+
+  return data
+
+def artist_details(artist_id, now):
+  # everything the artist page (and the api) shows about an artist, None if there is no such artist
+  query_on_artist = db.session.get(Artist, artist_id)
+
+  # if query on artist fails
+  if not query_on_artist:
+    return None
+
+  # if we got artist
+  # then populate details of upcoming_shows[] and past_shows[]
+  # query -> get all shows with corresponding their venue details in one go, then split them into upcoming/past
+  query_on_upcoming, query_on_past = partition_shows(artist_shows(artist_id), now)
+
+  upcoming_shows = []
+  past_shows = []
+
+
+  for curr_show in query_on_upcoming:
+    upcoming_shows.append({
+      "venue_id": curr_show.venue_id,
+      "venue_name": curr_show.venue.name,
+      "venue_image_link": curr_show.venue.image_link,
+      "start_time": curr_show.start_time
+      })
+
+  for curr_show in query_on_past:
+    past_shows.append({
+      "venue_id": curr_show.venue_id,
+      "venue_name": curr_show.venue.name,
+      "venue_image_link": curr_show.venue.image_link,
+      "start_time": curr_show.start_time
+      })
+
+  # populate data[] to be sent to the view/api
+  data = {
+    "id": query_on_artist.id,
+    "name": query_on_artist.name,
+    "genres": query_on_artist.genres,
+    "city": query_on_artist.city,
+    "state": query_on_artist.state,
+    "phone": query_on_artist.phone,
+    "website": query_on_artist.website,
+    "facebook_link": query_on_artist.facebook_link,
+    "seeking_venue": query_on_artist.seeking_venue,
+    "seeking_description": query_on_artist.seeking_description,
+    "image_link": query_on_artist.image_link,
+    "past_shows": past_shows,
+    "upcoming_shows": upcoming_shows,
+    "past_shows_count": len(past_shows),
+    "upcoming_shows_count": len(upcoming_shows)
+  }
+
+  return data
+
+def show_list_page(limit, after=None, before=None):
+  # a page of shows with corresponding artist and venues details, in start_time order
+  query_on_shows, page = keyset_page(shows_statement(), SHOW_PAGE_KEYS, lambda show: (show.start_time, show.id), limit, after, before, scalars=True)
+
+  data = []
+  for curr_show in query_on_shows:
+    data.append({
+      "venue_id": curr_show.venue_id,
+      "venue_name": curr_show.venue.name,
+      "artist_id": curr_show.artist_id,
+      "artist_name": curr_show.artist.name,
+      "artist_image_link": curr_show.artist.image_link,
+      "start_time": curr_show.start_time
+      })
+
+  return data, page
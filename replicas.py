@@ -0,0 +1,167 @@
+#----------------------------------------------------------------------------#
+# Read replicas.
+#
+# GET and HEAD requests, and views marked @read_only (searches posted as
+# forms), send their SELECTs to a read replica, chosen round robin among the
+# replicas that passed their last health check and are not lagging too far
+# behind. Everything else stays on the primary (SQLALCHEMY_DATABASE_URI):
+# writes, SELECT ... FOR UPDATE, statements run outside a request (cli, jobs)
+# and all requests of a client for a few seconds after one of its requests
+# committed, so it reads its own writes.
+# Without replicas configured every statement goes to the primary.
+#----------------------------------------------------------------------------#
+
+import os
+import time
+import threading
+from flask import g, request, session, current_app, has_app_context, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, event, text, orm
+from sqlalchemy.sql.selectable import Select
+from pooling import engine_options
+
+# replication lag in seconds, 0 when the replica has replayed everything it received
+POSTGRES_LAG = text(
+  "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+  "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END")
+# other databases only get a liveness check
+NO_LAG = text('SELECT 0')
+
+
+class Replica(object):
+
+  def __init__(self, url, engine_options):
+    self.engine = create_engine(url, **engine_options)
+    self.healthy = True
+    self.lag = 0.0
+    self.checked_at = None
+    # a dropped connection takes the replica out of rotation until the next check
+    event.listen(self.engine, 'handle_error', self._handle_error)
+
+  def _handle_error(self, context):
+    if context.is_disconnect:
+      self.healthy = False
+
+  def check(self):
+    query = POSTGRES_LAG if self.engine.dialect.name == 'postgresql' else NO_LAG
+    try:
+      with self.engine.connect() as connection:
+        self.lag = float(connection.execute(query).scalar() or 0)
+      self.healthy = True
+    except Exception:
+      self.healthy = False
+    self.checked_at = time.monotonic()
+
+
+class ReplicaSet(object):
+
+  def __init__(self, urls, config, max_lag, check_interval):
+    # each replica gets a pool of its own, named replica-1, replica-2, ... in the metrics
+    self.replicas = [Replica(url, engine_options(url, config, 'replica-{}'.format(index))) for index, url in enumerate(urls, start=1)]
+    self.max_lag = max_lag
+    self.check_interval = check_interval
+    self._next = 0
+    self._lock = threading.Lock()
+    # pid of the process whose checker thread is running
+    self._checker_pid = None
+
+  def _start_checker(self):
+    # health and lag checks run on a daemon thread, never inside a request: connecting to an
+    # unreachable replica can take the whole connect timeout. one thread per process, started
+    # by its first pick, as threads do not survive the fork of a preloading server
+    pid = os.getpid()
+    if self._checker_pid == pid:
+      return
+    with self._lock:
+      if self._checker_pid == pid:
+        return
+      threading.Thread(target=self._check_forever, name='replica-checks', daemon=True).start()
+      self._checker_pid = pid
+
+  def _check_forever(self):
+    while True:
+      for replica in self.replicas:
+        replica.check()
+      time.sleep(self.check_interval)
+
+  def pick(self):
+    # engine of the next usable replica, None when all are down, lagging or not checked yet (use the primary)
+    self._start_checker()
+    usable = [replica for replica in self.replicas
+      if replica.checked_at is not None and replica.healthy and replica.lag <= self.max_lag]
+    if not usable:
+      return None
+    self._next = (self._next + 1) % len(usable)
+    return usable[self._next].engine
+
+
+class RoutingSession(SignallingSession):
+
+  def get_bind(self, mapper=None, clause=None):
+    # SELECTs of a request routed to a replica go there, the rest to the primary.
+    # is_select is also true of the lambda_stmt() statements of queries.py, none of which lock rows
+    if not self._flushing and getattr(clause, 'is_select', False) and has_app_context():
+      locking = isinstance(clause, Select) and clause._for_update_arg is not None
+      replica = g.get('db_replica')
+      if replica is not None and not locking:
+        return replica
+    return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(db_session):
+  # the request wrote something, see _stick_to_primary
+  if has_request_context():
+    g.db_committed = True
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+  # SQLAlchemy whose session routes reads with RoutingSession
+
+  def create_session(self, options):
+    return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+#----------------------------------------------------------------------------#
+# Flask hooks.
+#----------------------------------------------------------------------------#
+
+# methods whose requests may read from a replica
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def read_only(view):
+  # marks a view that never writes, so its requests may read from a replica whatever their method
+  view.replica_reads = True
+  return view
+
+def _route_request(replica_set):
+  def route():
+    view = current_app.view_functions.get(request.endpoint)
+    readable = request.method in READ_METHODS or getattr(view, 'replica_reads', False)
+    # clients that wrote recently stay on the primary
+    if readable and session.get('db_primary_until', 0) < time.time():
+      g.db_replica = replica_set.pick()
+  return route
+
+def _stick_to_primary(sticky_seconds):
+  def stick(response):
+    # only requests that committed, a failed form or a search leaves the client on the replicas
+    if g.get('db_committed'):
+      session['db_primary_until'] = time.time() + sticky_seconds
+    return response
+  return stick
+
+
+def init_app(app):
+  # reads of GET/HEAD requests go to SQLALCHEMY_REPLICA_URIS. returns the ReplicaSet, None without replicas
+  urls = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+  if not urls:
+    return None
+
+  replica_set = ReplicaSet(urls,
+    app.config,
+    app.config['REPLICA_MAX_LAG_SECONDS'],
+    app.config['REPLICA_CHECK_SECONDS'])
+  app.before_request(_route_request(replica_set))
+  app.after_request(_stick_to_primary(app.config['REPLICA_STICKY_SECONDS']))
+  return replica_set
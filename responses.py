@@ -0,0 +1,135 @@
+#----------------------------------------------------------------------------#
+# Responses.
+# helpers shared by the venue, artist and show blueprints
+#----------------------------------------------------------------------------#
+
+import json
+from datetime import timezone
+from flask import request, Response, make_response, session, url_for, current_app
+try:
+  # much faster json encoder, optional
+  import orjson
+except ImportError:
+  orjson = None
+import metrics
+from cache import page_cache
+from models import db, Show
+
+#----------------------------------------------------------------------------#
+# Conditional requests.
+#----------------------------------------------------------------------------#
+
+def not_modified(etag, last_modified):
+  # does the client already have this version? (If-None-Match wins over If-Modified-Since)
+  if request.if_none_match:
+    return request.if_none_match.contains(etag)
+  since = request.if_modified_since
+  if since is not None:
+    if since.tzinfo is not None:
+      since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return last_modified <= since
+  return False
+
+def conditional_response(response, etag, last_modified):
+  # validators on a full response. no-cache: clients may store it but have to revalidate every time
+  response = make_response(response)
+  response.set_etag(etag)
+  response.last_modified = last_modified
+  response.cache_control.no_cache = True
+  return response
+
+def not_modified_response(etag, last_modified):
+  return conditional_response(Response(status=304), etag, last_modified)
+
+def flashes_pending():
+  # a flashed message is waiting for the next page. check before rendering, the template consumes them
+  return '_flashes' in session
+
+def uncacheable_response(response):
+  # a page carrying flashed messages: no validators and not stored, or a later 304 (or the back button)
+  # would show the message again
+  response = make_response(response)
+  response.cache_control.no_store = True
+  return response
+
+#----------------------------------------------------------------------------#
+# Page cache.
+#----------------------------------------------------------------------------#
+
+def venue_page_key(venue_id):
+  return 'venue:{}'.format(venue_id)
+
+def artist_page_key(artist_id):
+  return 'artist:{}'.format(artist_id)
+
+def page_ttl(upcoming_shows, now):
+  # a cached page goes stale when its next upcoming show starts and becomes a past show
+  if not upcoming_shows:
+    return current_app.config['CACHE_TTL']
+  starts_in = (upcoming_shows[0]['start_time'] - now).total_seconds()
+  return max(1, min(current_app.config['CACHE_TTL'], starts_in))
+
+def cached_html(key, etag):
+  # html cached under key, None unless it was rendered for the version <etag> names.
+  # the memory backend is per process: another worker may still hold the page from before an edit
+  entry = page_cache.get(key)
+  if entry is None:
+    return None
+  version, _, html = entry.partition('\n')
+  return html if version == etag else None
+
+def store_page(key, etag, html, ttl):
+  page_cache.set(key, etag + '\n' + html, ttl)
+
+def cached_page(key, etag, page, render):
+  # html of a detail page from the cache, rendered and stored on a miss.
+  # render() returns (html, ttl). pages carrying flashed messages do not come here, see flashes_pending
+  html = cached_html(key, etag)
+  if html is not None:
+    metrics.PAGE_CACHE.inc(page, 'hit')
+    return html
+  metrics.PAGE_CACHE.inc(page, 'miss')
+  html, ttl = render()
+  store_page(key, etag, html, ttl)
+  return html
+
+def venue_page_keys(venue_id):
+  # the venue page and the pages of every artist playing there, they show the venue name and image
+  artist_ids = db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+  return [venue_page_key(venue_id)] + [artist_page_key(artist_id) for artist_id, in artist_ids]
+
+def artist_page_keys(artist_id):
+  # the artist page and the pages of every venue the artist plays at
+  venue_ids = db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+  return [artist_page_key(artist_id)] + [venue_page_key(venue_id) for venue_id, in venue_ids]
+
+#----------------------------------------------------------------------------#
+# API.
+# read-only json mirror of the html pages, built from the same page data functions
+#----------------------------------------------------------------------------#
+
+def api_response(payload, status=200):
+  if orjson is not None:
+    body = orjson.dumps(payload)
+  else:
+    body = json.dumps(payload, separators=(',', ':'), default=lambda value: value.isoformat())
+  return Response(body, status=status, mimetype='application/json')
+
+def api_fields(item):
+  # ?fields=id,name keeps only those keys of each returned object
+  fields = request.args.get('fields')
+  if not fields:
+    return item
+  wanted = set(field.strip() for field in fields.split(','))
+  return {key: value for key, value in item.items() if key in wanted}
+
+def api_page(items, page):
+  # a list response with the cursors of the neighbouring pages
+  return api_response({
+    "data": [api_fields(item) for item in items],
+    "next": url_for(request.endpoint, after=page['next'], limit=page['limit'], fields=request.args.get('fields')) if page['next'] else None,
+    "prev": url_for(request.endpoint, before=page['prev'], limit=page['limit'], fields=request.args.get('fields')) if page['prev'] else None
+  })
+
+def api_not_found():
+  return api_response({"error": "not found"}, 404)
@@ -0,0 +1,79 @@
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+import sys
+from flask import Blueprint, render_template, request, flash
+from models import db, Show
+from pagination import page_args
+from queries import SHOW_PAGE_KEYS, show_list_page
+from counters import adjust_show_counts
+from responses import venue_page_key, artist_page_key, api_page
+from cache import page_cache
+
+bp = Blueprint('shows', __name__)
+
+@bp.route('/shows')
+def shows():
+  # displays list of shows at /shows
+  # TODO-DONE: replace with real venues data.
+  #       num_shows should be aggregated based on number of upcoming shows per venue.
+  
+
+  # a page of shows with corresponding artist and venues details, in start_time order
+  data, page = show_list_page(**page_args(SHOW_PAGE_KEYS))
+
+  return render_template('pages/shows.html', shows=data, page=page)
+
+@bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  from forms import ShowForm
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO-DONE: insert form data as a new Show record in the db, instead
+
+  error = False
+  try:
+    artist_id = request.form['artist_id']
+    venue_id = request.form['venue_id']
+    # parsed here instead of handing the raw string to the database, which only postgres accepts
+    import dateutil.parser
+    start_time = dateutil.parser.parse(request.form['start_time'])
+
+    # new show object
+    # counters first: without a counter checkpoint they are recounted from the show table,
+    # which must not see the new show yet. one commit for both
+    adjust_show_counts(venue_id, artist_id, start_time, 1)
+    show = Show(artist_id=artist_id, venue_id=venue_id, start_time=start_time)
+    db.session.add(show)
+    db.session.commit()
+    page_cache.delete(venue_page_key(venue_id), artist_page_key(artist_id))
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    # TODO-Done: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Show could not be listed.')
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing
+    flash('An error occurred. Show could not be listed.')
+  # on successful db insert, flash success
+  else:
+    flash('Show was successfully listed!')
+
+  return render_template('pages/home.html')
+
+#  API
+#  ----------------------------------------------------------------
+
+@bp.route('/api/v1/shows')
+def api_shows():
+  data, page = show_list_page(**page_args(SHOW_PAGE_KEYS))
+  return api_page(data, page)
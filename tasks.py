@@ -0,0 +1,49 @@
+#----------------------------------------------------------------------------#
+# Background jobs.
+# the tasks `flask worker` runs, see jobs.py
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta
+from flask import current_app
+from config import JOB_SCHEDULE, JOB_THREADS, JOB_POLL_SECONDS, JOB_MAX_ATTEMPTS, JOB_TIMEOUT_SECONDS, JOB_RETENTION_DAYS
+import jobs
+from models import db, Venue, Artist, Job
+from counters import refresh_show_counts
+from queries import venue_validator, artist_validator
+from responses import venue_page_key, artist_page_key, cached_html, store_page
+from venues import render_venue_page
+from artists import render_artist_page
+
+@jobs.task('refresh-counters')
+def refresh_counters_job():
+  refresh_show_counts(datetime.now())
+
+@jobs.task('warm-page-cache')
+def warm_page_cache_job(limit=100):
+  # render the pages of the venues and artists with most upcoming shows that are not cached yet.
+  # with the memory backend this only warms the cache of the process running the job
+  now = datetime.now()
+  for model, page_key, validate, render, path in (
+      (Venue, venue_page_key, venue_validator, render_venue_page, '/venues/{}'),
+      (Artist, artist_page_key, artist_validator, render_artist_page, '/artists/{}')):
+    top = db.session.query(model.id).order_by(model.upcoming_shows_count.desc(), model.id).limit(limit)
+    for entity_id, in top:
+      # stored with the etag the page is served under, see responses.cached_page
+      validator = validate(entity_id, now)
+      if validator is not None and cached_html(page_key(entity_id), validator[0]) is None:
+        # templates use request.endpoint and url_for
+        with current_app.test_request_context(path.format(entity_id)):
+          html, ttl = render(entity_id, now)
+        store_page(page_key(entity_id), validator[0], html, ttl)
+
+@jobs.task('purge-jobs')
+def purge_jobs_job():
+  jobs.purge(db, Job, datetime.now() - timedelta(days=JOB_RETENTION_DAYS))
+
+def job_worker(app, threads=JOB_THREADS):
+  return jobs.Worker(app, db, Job,
+    threads=threads,
+    poll_interval=JOB_POLL_SECONDS,
+    schedule=JOB_SCHEDULE,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    timeout=JOB_TIMEOUT_SECONDS)
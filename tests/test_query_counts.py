@@ -0,0 +1,82 @@
+#----------------------------------------------------------------------------#
+# Statements per page.
+#
+# Seeds two throwaway sqlite databases of different sizes and checks that
+# every listing and detail page runs the same number of SQL statements on
+# both: a page whose count grows with the data has an N+1 query.
+#
+#   python -m unittest tests.test_query_counts    (or python -m pytest tests)
+#----------------------------------------------------------------------------#
+
+import os
+import tempfile
+import unittest
+import warnings
+from datetime import datetime
+from sqlalchemy import event
+from app import create_app
+from models import db, Venue, Artist, Show
+from counters import recount_show_counts
+import datagen
+
+# (venues, artists, shows) of the two databases
+SIZES = ((20, 50, 400), (100, 250, 4000))
+
+
+def busiest(model):
+  # id of the venue/artist with the most shows, its detail page has the most rows to load
+  total = model.upcoming_shows_count + model.past_shows_count
+  return db.session.query(model.id).order_by(total.desc(), model.id).first()[0]
+
+def statement_counts(venues, artists, shows):
+  # {path: statements run by GET path} on a database of the given size
+  directory = tempfile.TemporaryDirectory(prefix='fyyur-test-')
+  # the app writes error.log to the working directory
+  cwd = os.getcwd()
+  os.chdir(directory.name)
+  try:
+    # no page cache, every request runs its queries
+    app = create_app({
+      "SQLALCHEMY_DATABASE_URI": 'sqlite:///' + os.path.join(directory.name, 'test.db'),
+      "CACHE_BACKEND": 'none'
+    })
+    statements = []
+    with app.app_context():
+      db.create_all()
+      datagen.generate(db, Venue, Artist, Show, venues, artists, shows, area_count=5, seed=0)
+      recount_show_counts(datetime.now())
+      paths = ('/venues', '/artists', '/shows',
+        '/venues/{}'.format(busiest(Venue)), '/artists/{}'.format(busiest(Artist)),
+        '/api/v1/venues', '/api/v1/artists', '/api/v1/shows')
+      engine = db.engine
+      event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    client = app.test_client()
+    counts = {}
+    for path in paths:
+      del statements[:]
+      response = client.get(path)
+      assert response.status_code == 200, '{} answered {}'.format(path, response.status_code)
+      # detail paths differ between the databases, compare them by page
+      counts[path.rsplit('/', 1)[0] + '/<id>' if path[-1].isdigit() else path] = len(statements)
+    engine.dispose()
+    return counts
+  finally:
+    os.chdir(cwd)
+    directory.cleanup()
+
+
+class QueryCountTest(unittest.TestCase):
+
+  def test_statements_per_page_do_not_grow_with_the_data(self):
+    with warnings.catch_warnings():
+      warnings.simplefilter('ignore')
+      small, large = [statement_counts(*size) for size in SIZES]
+    self.assertEqual(small, large)
+    # a handful each, listings and detail pages load in one or two selects
+    for page, count in large.items():
+      self.assertLessEqual(count, 5, page)
+
+
+if __name__ == '__main__':
+  unittest.main()
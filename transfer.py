@@ -0,0 +1,71 @@
+#----------------------------------------------------------------------------#
+# Import and export.
+# bulk loads and dumps of the venue, artist and show tables, over http and `flask import-data`/`export-data`
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from flask import Blueprint, render_template, request, Response, jsonify, stream_with_context
+import importer
+import exporter
+from models import db, Venue, Artist, Show
+from counters import recount_show_counts
+from cache import page_cache
+
+bp = Blueprint('transfer', __name__)
+
+# what can be bulk imported: name of the form (in forms.py) validating each row and model the rows go into
+IMPORT_KINDS = {
+  'venues': ('VenueForm', Venue),
+  'artists': ('ArtistForm', Artist),
+  'shows': ('ShowForm', Show)
+}
+
+# what can be exported
+EXPORT_TABLES = {
+  'venues': Venue.__table__,
+  'artists': Artist.__table__,
+  'shows': Show.__table__
+}
+
+def import_kind(kind):
+  # (form class, model) of an import kind. forms.py pulls in WTForms, only loaded once something is imported
+  import forms
+  form_name, model = IMPORT_KINDS[kind]
+  return getattr(forms, form_name), model
+
+def import_file(kind, stream, fmt, batch_size=importer.BATCH_SIZE):
+  # import a file of <kind> and bring the counters and the page cache up to date, returns the report
+  form_class, model = import_kind(kind)
+  report = importer.import_stream(db, form_class, model.__table__, stream, fmt, batch_size)
+  # COPY/executemany skip the counter upkeep
+  if model is Show and report['imported']:
+    recount_show_counts(datetime.now())
+  # a bulk import can touch any page. only reaches the workers' caches with the redis backend,
+  # memory caches of other processes expire after CACHE_TTL
+  page_cache.clear()
+  return report
+
+@bp.route('/import/<kind>', methods=['POST'])
+def import_data(kind):
+  # bulk import of a csv or ndjson file uploaded as <file>, format from ?format= or the file extension
+  if kind not in IMPORT_KINDS or 'file' not in request.files:
+    return jsonify({"error": "expected a file upload to one of /import/" + "|".join(IMPORT_KINDS)}), 400
+
+  upload = request.files['file']
+  fmt = request.args.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+  if fmt not in importer.READERS:
+    return jsonify({"error": "unsupported format '{}', use csv or ndjson".format(fmt)}), 400
+
+  report = import_file(kind, upload.stream, fmt)
+  return jsonify(report), 200 if not report['failed_batches'] else 207
+
+@bp.route('/export/<kind>.<fmt>')
+def export_data(kind, fmt):
+  # streams the whole table, bytes start flowing before the query is done (chunked transfer)
+  if kind not in EXPORT_TABLES or fmt not in exporter.FORMATS:
+    return render_template('errors/404.html'), 404
+
+  pieces = exporter.export(db, EXPORT_TABLES[kind], fmt)
+  response = Response(stream_with_context(pieces), mimetype=exporter.FORMATS[fmt])
+  response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(kind, fmt)
+  return response
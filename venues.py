@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------#
+# Venues.
+# forms.py (WTForms) is imported by the views that render a form, on first use
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from models import db, Venue
+from pagination import page_args
+from queries import VENUE_PAGE_KEYS, venue_areas, search_by_name, venue_validator, venue_details
+from responses import not_modified, conditional_response, not_modified_response, flashes_pending, uncacheable_response, \
+  venue_page_key, venue_page_keys, page_ttl, cached_page, api_response, api_fields, api_page, api_not_found
+from cache import page_cache
+from replicas import read_only
+
+bp = Blueprint('venues', __name__)
+
+def render_venue_page(venue_id, now):
+  # (html, seconds it may be cached) of an existing venue's page
+  data = venue_details(venue_id, now)
+  return render_template('pages/show_venue.html', venue=data), page_ttl(data['upcoming_shows'], now)
+
+@bp.route('/venues')
+def venues():
+  # TODO-DONE: replace with real venues data.
+        # num_shows should be aggregated based on number of upcoming shows per venue.
+
+  # areas, venues and upcoming show counts of a page all come from one query
+  data, page = venue_areas(**page_args(VENUE_PAGE_KEYS))
+
+  return render_template('pages/venues.html', areas=data, page=page);
+
+@bp.route('/venues/search', methods=['POST'])
+@read_only
+def search_venues():
+  # TODO-DONE: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+
+  search_term=request.form.get('search_term', '')
+  all_matching_results = search_by_name(Venue, search_term)
+  matching_result_data = []
+
+  for result in all_matching_results:
+    matching_result_data.append({
+      "id": result.id,
+      "name": result.name,
+      "num_upcoming_shows": result.upcoming_shows_count
+      })
+
+  # make response dictionary from all_matching results
+  response = {
+    "count": len(all_matching_results),
+    "data": matching_result_data
+  }
+
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/venues/<int:venue_id>')
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO-DONE: replace with real venue data from the venues table, using venue_id
+  
+  now = datetime.now()
+
+  # cheap validator first: a repeat visit is answered with 304 before the heavy queries run
+  validator = venue_validator(venue_id, now)
+
+  # if we did not get any venue corresponding to <venue_id>
+  if validator is None:
+    return render_template('errors/404.html')
+  # e.g. right after an edit: sent in full, without etag/last-modified and not from the cache
+  if flashes_pending():
+    return uncacheable_response(render_venue_page(venue_id, now)[0])
+  if not_modified(*validator):
+    return not_modified_response(*validator)
+
+  html = cached_page(venue_page_key(venue_id), validator[0], 'venue', lambda: render_venue_page(venue_id, now))
+  return conditional_response(html, *validator)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  from forms import VenueForm
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO-DONE: insert form data as a new Venue record in the db, instead
+  # TODO-DONE: modify data to be the data object returned from db insertion
+  error = False
+  try:
+    # get details
+    venue = Venue(
+      name = request.form['name']
+      ,city = request.form['city']
+      ,state = request.form['state']
+      ,address = request.form['address']
+      ,phone = request.form['phone']
+      ,genres = request.form.getlist('genres')
+      ,facebook_link = request.form['facebook_link']
+      # uncomment following lines if there is corresponding input space avilable in the form
+      # ,image_link = request.form['image_link']
+      # ,website = request.form['website']
+      # ,seeking_talent = True if 'seeking_talent' in request.form else False
+      # ,seeking_description = request.form['seeking_description']
+    )
+
+    db.session.add(venue)
+    db.session.commit()
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if error:
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    # TODO-DONE: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+    flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+  else:
+    # on successful db insert, flash success
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+  
+  return render_template('pages/home.html')
+
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+  # TODO-DONE: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+  error = False
+  try:
+    # cached pages are dropped after the commit, so no request can put the old version back in between
+    page_keys = venue_page_keys(venue_id)
+    venue = Venue.query.get(venue_id)
+    db.session.delete(venue)
+    db.session.commit()
+    page_cache.delete(*page_keys)
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if error:
+    flash(f'An error occurred. Venue {venue_id} could not be deleted.')
+  else:
+    flash(f'Venue {venue_id} was successfully deleted.')
+
+
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  # return None <- originally
+  # replaced code to render home page
+  return render_template('pages/home.html')
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  from forms import VenueForm
+  form = VenueForm()
+  
+  # TODO-DONE: populate form with values from venue with ID <venue_id>
+
+  venue = Venue.query.get(venue_id)
+
+  # populate form details with existing ones
+  if venue:
+    form.name.data = venue.name
+    form.city.data = venue.city
+    form.state.data = venue.state
+    form.phone.data = venue.phone
+    form.address.data = venue.address
+    form.genres.data = venue.genres
+    form.facebook_link.data = venue.facebook_link
+    # uncomment these lines if there are corresponding inputs options in form venue/<venue-id>/edit
+    # form.image_link.data = venue.image_link
+    # form.website.data = venue.website
+    # form.seeking_talent.data = venue.seeking_talent
+    # form.seeking_description.data = venue.seeking_description
+
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO-DONE: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  error = False
+  venue = Venue.query.get(venue_id)
+
+  try:
+    venue.name = request.form['name']
+    venue.city = request.form['city']
+    venue.state = request.form['state']
+    venue.address = request.form['address']
+    venue.phone = request.form['phone']
+    venue.genres = request.form.getlist('genres')
+    venue.facebook_link = request.form['facebook_link']
+    # uncomment these lines if there are corresponding inputs options in form venue/<venue-id>/edit
+    # venue.image_link = request.form['image_link']
+    # venue.website = request.form['website']
+    # venue.seeking_talent = True if 'seeking_talent' in request.form else False 
+    # venue.seeking_description = request.form['seeking_description']
+
+    db.session.commit()
+    page_cache.delete(*venue_page_keys(venue_id))
+  except:
+    error = True
+    db.session.rollback()
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+
+  if error:
+    flash(f'An error occurred while updating Venue.')
+  else:
+    flash(f'Venue updated successfully!')
+
+  return redirect(url_for('venues.show_venue', venue_id=venue_id))
+
+#  API
+#  ----------------------------------------------------------------
+
+@bp.route('/api/v1/venues')
+def api_venues():
+  # same areas as /venues, flattened to one object per venue
+  areas, page = venue_areas(**page_args(VENUE_PAGE_KEYS))
+  items = [dict(venue, city=area['city'], state=area['state']) for area in areas for venue in area['venues']]
+  return api_page(items, page)
+
+@bp.route('/api/v1/venues/<int:venue_id>')
+def api_venue(venue_id):
+  now = datetime.now()
+  validator = venue_validator(venue_id, now, 'json')
+  if validator is None:
+    return api_not_found()
+  if not_modified(*validator):
+    return not_modified_response(*validator)
+  return conditional_response(api_response(api_fields(venue_details(venue_id, now))), *validator)
@@ -0,0 +1,62 @@
+#----------------------------------------------------------------------------#
+# WSGI entry point.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# gunicorn.conf.py preloads this module in the master: the app is created,
+# every template compiled and the locale data loaded once, and the forked
+# workers share those pages copy-on-write instead of each building their own.
+# What must not be shared, database connections and the error.log file
+# handler, is recreated in every worker by post_fork().
+#----------------------------------------------------------------------------#
+
+import gc
+from datetime import datetime
+from logging import FileHandler
+from app import create_app, add_file_handler
+from models import db
+from filters import format_datetime, DATETIME_FORMATS
+
+application = app = create_app()
+
+
+def engines():
+  # the primary engine and the read replica engines
+  replica_set = app.extensions['replica_set']
+  replica_engines = [replica.engine for replica in replica_set.replicas] if replica_set is not None else []
+  return [db.get_engine(app)] + replica_engines
+
+def preload():
+  # heavy one-time work, done in the master when preloading. what create_app() leaves
+  # for first use (babel and its locale data, dateutil, WTForms) is loaded here, once for all workers
+  import forms
+  import dateutil.parser
+  for name in app.jinja_env.list_templates():
+    app.jinja_env.get_template(name)
+  for format in DATETIME_FORMATS:
+    format_datetime(datetime.now(), format)
+
+  # connections opened so far would otherwise be inherited by every worker
+  for engine in engines():
+    engine.dispose()
+
+  # objects created up to here are left alone by the garbage collector from now on,
+  # its passes would write to (and so copy) their pages in every worker
+  if hasattr(gc, 'freeze'):
+    gc.freeze()
+
+def post_fork():
+  # called in each worker right after the fork, see gunicorn.conf.py
+  for engine in engines():
+    # start a new pool without closing the master's connections, they are not ours to close
+    engine.dispose(close=False)
+
+  # the inherited handler shares its file offset and lock state with the master and the other workers
+  for handler in list(app.logger.handlers):
+    if isinstance(handler, FileHandler):
+      app.logger.removeHandler(handler)
+      handler.close()
+      add_file_handler(app)
+
+
+preload()